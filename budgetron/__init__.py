@@ -19,17 +19,28 @@ from .resources import (
     CategoryDetailResource,
     TransactionListResource,
     TransactionDetailResource,
+    TransactionImportResource,
+    TransactionExportResource,
+    TransactionStatsResource,
     ReportListResource,
     ReportDetailResource,
+    ReportCacheResource,
+    ReportSummaryResource,
+    ReportDownloadResource,
     BudgetListResource,
     BudgetDetailResource,
+    BudgetAlertListResource,
+    BudgetBulkResource,
+    BudgetDashboardResource,
 )
 from .utils.db import db
+from .utils.jobs import report_queue
 from .utils.logging_config import setup_logging
 from .utils.logging_utils import log_event
+from .utils.lookups import get_by_id
 from .utils.security import bcrypt
 from .utils.jwt import jwt
-from .commands import create_admin, seed
+from .commands import create_admin, seed, sweep_reports, adopt_report_files, rollups, partitions, check_indexes, benchmark_indexes, benchmark_search, benchmark_amounts
 
 migrate = Migrate()
 
@@ -50,6 +61,7 @@ def create_app():
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     jwt.init_app(app)
+    report_queue.init_app(app)
     CORS(
         app,
         resources={r"/api/*": {"origins": frontend_url}},
@@ -64,10 +76,11 @@ def create_app():
     except OSError:
         pass
 
-    # Ensure static/reports directory exists
+    # Ensure the report storage directory exists
+    if not app.config.get('REPORT_STORAGE_DIR'):
+        app.config['REPORT_STORAGE_DIR'] = os.path.join(app.instance_path, 'reports')
     try:
-        reports_dir = os.path.join(app.root_path, 'static', 'reports')
-        os.makedirs(reports_dir)
+        os.makedirs(app.config['REPORT_STORAGE_DIR'])
     except OSError:
         pass
 
@@ -87,18 +100,35 @@ def create_app():
     # Transaction resource
     api.add_resource(TransactionListResource, '/api/transactions/')
     api.add_resource(TransactionDetailResource, '/api/transactions/<int:transaction_id>')
+    api.add_resource(TransactionImportResource, '/api/transactions/import')
+    api.add_resource(TransactionExportResource, '/api/transactions/export')
+    api.add_resource(TransactionStatsResource, '/api/transactions/stats')
 
     # Report resource
     api.add_resource(ReportListResource, '/api/reports/')
     api.add_resource(ReportDetailResource, '/api/reports/<int:report_id>')
+    api.add_resource(ReportDownloadResource, '/api/reports/<int:report_id>/download')
+    api.add_resource(ReportCacheResource, '/api/reports/cache')
+    api.add_resource(ReportSummaryResource, '/api/reports/summary')
 
     # Budget resource
     api.add_resource(BudgetListResource, '/api/budgets/')
     api.add_resource(BudgetDetailResource, '/api/budgets/<int:budget_id>')
+    api.add_resource(BudgetAlertListResource, '/api/budgets/alerts')
+    api.add_resource(BudgetBulkResource, '/api/budgets/bulk')
+    api.add_resource(BudgetDashboardResource, '/api/budgets/dashboard')
 
     # Commands
     app.cli.add_command(create_admin)
     app.cli.add_command(seed)
+    app.cli.add_command(sweep_reports)
+    app.cli.add_command(adopt_report_files)
+    app.cli.add_command(rollups)
+    app.cli.add_command(partitions)
+    app.cli.add_command(check_indexes)
+    app.cli.add_command(benchmark_indexes)
+    app.cli.add_command(benchmark_search)
+    app.cli.add_command(benchmark_amounts)
 
     @app.before_request
     def load_user_from_jwt():
@@ -124,7 +154,7 @@ def create_app():
             verify_jwt_in_request(optional=True)
             user_id = get_jwt_identity()
             if user_id:
-                g.user = User.query.get(user_id)
+                g.user = get_by_id(User, int(user_id))
             else:
                 g.user = None
         except ExpiredSignatureError:
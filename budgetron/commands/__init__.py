@@ -1,5 +1,17 @@
 from .admin import CreateAdminCommand
 from .seed import SeedCommand
+from .report import AdoptReportFilesCommand, SweepReportsCommand
+from .rollup import RollupsCommand
+from .partition import PartitionsCommand
+from .explain import BenchmarkAmountsCommand, BenchmarkIndexesCommand, BenchmarkSearchCommand, CheckIndexesCommand
 
 create_admin = CreateAdminCommand()
 seed = SeedCommand()
+sweep_reports = SweepReportsCommand()
+adopt_report_files = AdoptReportFilesCommand()
+rollups = RollupsCommand()
+partitions = PartitionsCommand()
+check_indexes = CheckIndexesCommand()
+benchmark_indexes = BenchmarkIndexesCommand()
+benchmark_search = BenchmarkSearchCommand()
+benchmark_amounts = BenchmarkAmountsCommand()
@@ -0,0 +1,117 @@
+import click
+from flask.cli import with_appcontext
+
+from budgetron.services.amount_benchmark import run_amount_benchmark
+from budgetron.services.index_benchmark import run_index_benchmark, run_search_benchmark
+from budgetron.services.query_checks import check_indexes
+
+
+class CheckIndexesCommand(click.Command):
+    def __init__(self):
+        super().__init__(
+            name='check-indexes',
+            help="EXPLAIN the hot queries and check they are served by indexes.",
+            params=[
+                click.Option(['--user-id'], type=int, default=1, help='User the queries are planned for'),
+                click.Option(['--month'], default=None, help='Month of date range queries (YYYY-MM)'),
+            ],
+            callback=self.run
+        )
+
+    @with_appcontext
+    def run(self, user_id, month):
+        """Fails if any hot query is planned with a sequential scan of its table."""
+        results = check_indexes(user_id, month)
+        for result in results:
+            status = ('ok' if result.preferred else 'ok, other index') if result.passed else 'FAIL'
+            click.echo(
+                f"[{status}] {result.name}: expected {result.index}, "
+                f"plan uses {', '.join(result.indexes) or 'no index'} ({' > '.join(result.node_types)})"
+            )
+
+        failed = [result for result in results if not result.passed]
+        if failed:
+            raise click.ClickException(f"{len(failed)} query plan(s) scan their table sequentially.")
+
+
+class BenchmarkIndexesCommand(click.Command):
+    def __init__(self):
+        super().__init__(
+            name='benchmark-indexes',
+            help="Time the list endpoint queries on a seeded dataset with and without their indexes.",
+            params=[
+                click.Option(['--users'], type=int, default=200, help='Number of synthetic users'),
+                click.Option(['--transactions'], type=int, default=500000, help='Number of synthetic transactions'),
+                click.Option(['--repeat'], type=int, default=20, help='Timed runs per query'),
+            ],
+            callback=self.run
+        )
+
+    @with_appcontext
+    def run(self, users, transactions, repeat):
+        """
+        Seeds and measures inside a single transaction that is rolled back, so
+        no data or index changes persist. Dropping the indexes locks the tables
+        until it finishes: run it against a development database.
+        """
+        click.echo(f"Seeding {users} users and {transactions} transactions...")
+        results = run_index_benchmark(users, transactions, repeat)
+
+        echo_benchmark(results)
+
+
+class BenchmarkSearchCommand(click.Command):
+    def __init__(self):
+        super().__init__(
+            name='benchmark-search',
+            help="Time transaction searches on a seeded table with and without the search indexes.",
+            params=[
+                click.Option(['--rows'], type=int, default=1000000, help='Number of synthetic transactions'),
+                click.Option(['--repeat'], type=int, default=10, help='Timed runs per query'),
+            ],
+            callback=self.run
+        )
+
+    @with_appcontext
+    def run(self, rows, repeat):
+        """Seeds and measures inside a rolled back transaction, like benchmark-indexes."""
+        click.echo(f"Seeding {rows} transactions for one user...")
+        echo_benchmark(run_search_benchmark(rows, repeat))
+
+
+class BenchmarkAmountsCommand(click.Command):
+    def __init__(self):
+        super().__init__(
+            name='benchmark-amounts',
+            help="Compare aggregating amounts stored as double precision and as BIGINT minor units.",
+            params=[
+                click.Option(['--rows'], type=int, default=1000000, help='Number of synthetic amounts'),
+                click.Option(['--users'], type=int, default=1000, help='Number of users the amounts belong to'),
+                click.Option(['--repeat'], type=int, default=10, help='Timed runs per measurement'),
+            ],
+            callback=self.run
+        )
+
+    @with_appcontext
+    def run(self, rows, users, repeat):
+        """Measures temporary tables inside a rolled back transaction."""
+        click.echo(f"Seeding {rows} amounts for {users} users...")
+        results = run_amount_benchmark(rows, users, repeat)
+
+        click.echo(f"{'measurement':<26}{'float':>16}{'integer':>16}")
+        for result in results:
+            click.echo(
+                f"{result.name:<26}{result.float_value:>10.4g} {result.unit:<5}"
+                f"{result.integer_value:>10.4g} {result.unit:<5}"
+            )
+
+
+def echo_benchmark(results):
+    """Print benchmark results as a table."""
+    click.echo(f"{'query':<28}{'with indexes':>14}{'without':>12}{'speedup':>10}")
+    for result in results:
+        speedup = result.without_indexes / result.with_indexes if result.with_indexes else 0
+        click.echo(
+            f"{result.name:<28}{result.with_indexes:>11.2f} ms"
+            f"{result.without_indexes:>9.2f} ms{speedup:>9.1f}x"
+        )
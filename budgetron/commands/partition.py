@@ -0,0 +1,78 @@
+import click
+from flask.cli import with_appcontext
+
+from budgetron.services.partition_service import (
+    PARTITION_MONTHS_AHEAD, archive_partitions, check_partition_pruning, create_future_partitions, list_partitions,
+)
+from budgetron.utils.months import current_month, parse_month
+
+
+def validate_month(ctx, param, value):
+    if value is None:
+        return value
+    try:
+        parse_month(value)
+    except ValueError:
+        raise click.BadParameter("Must be in the format 'YYYY-MM'.")
+    return value
+
+
+class PartitionsCommand(click.Command):
+    def __init__(self):
+        super().__init__(
+            name='partitions',
+            help="Maintain the monthly transaction partitions: flask partitions [list|create|archive|check]",
+            params=[
+                click.Argument(
+                    ['action'], type=click.Choice(['list', 'create', 'archive', 'check']), default='list',
+                    required=False,
+                ),
+                click.Option(
+                    ['--months-ahead'], type=int, default=PARTITION_MONTHS_AHEAD,
+                    help='create: future months to partition ahead of time',
+                ),
+                click.Option(
+                    ['--before'], default=None, callback=validate_month,
+                    help='archive: detach the partitions of the months before this one (YYYY-MM)',
+                ),
+                click.Option(['--drop'], is_flag=True, help='archive: drop detached partitions instead of keeping them'),
+                click.Option(['--user-id'], type=int, default=1, help='check: user the queries are planned for'),
+                click.Option(
+                    ['--month'], default=None, callback=validate_month,
+                    help='check: month the queries are scoped to (YYYY-MM)',
+                ),
+            ],
+            callback=self.run
+        )
+
+    @with_appcontext
+    def run(self, action, months_ahead, before, drop, user_id, month):
+        """Lists, creates or archives partitions, or checks month-scoped queries are pruned to one."""
+        if action == 'create':
+            created = create_future_partitions(months_ahead)
+            click.echo(f"Created {len(created)} partition(s){': ' + ', '.join(created) if created else '.'}")
+
+        elif action == 'archive':
+            if before is None:
+                raise click.UsageError("archive requires --before YYYY-MM.")
+            if before > current_month():
+                raise click.UsageError("Only partitions of past months can be archived.")
+            months = archive_partitions(before, drop)
+            verb = 'Dropped' if drop else 'Archived'
+            click.echo(f"{verb} {len(months)} partition(s){': ' + ', '.join(months) if months else '.'}")
+
+        elif action == 'check':
+            results = check_partition_pruning(user_id, month)
+            for result in results:
+                click.echo(
+                    f"[{'ok' if result.passed else 'FAIL'}] {result.name}: expected {result.expected}, "
+                    f"plan reads {', '.join(result.partitions) or 'no partition'}"
+                )
+
+            failed = [result for result in results if not result.passed]
+            if failed:
+                raise click.ClickException(f"{len(failed)} month-scoped query plan(s) read more than one partition.")
+
+        else:
+            for partition in list_partitions():
+                click.echo(f"{partition.name}: {partition.bounds} (~{partition.rows} rows)")
@@ -0,0 +1,69 @@
+import logging
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from budgetron.services.report_storage import adopt_legacy_report_files, fail_stale_reports, sweep_expired_reports
+from budgetron.utils.db import db
+
+logger = logging.getLogger(__name__)
+
+
+class SweepReportsCommand(click.Command):
+    def __init__(self):
+        super().__init__(
+            name='sweep-reports',
+            help="Fail stale report jobs and delete expired reports and their files, once or periodically.",
+            params=[
+                click.Option(
+                    ['--days'], type=int, default=None,
+                    help='Retention period in days (defaults to REPORT_RETENTION_DAYS)'
+                ),
+                click.Option(
+                    ['--every'], type=int, default=None,
+                    help='Keep running and sweep every this many seconds'
+                ),
+            ],
+            callback=self.run
+        )
+
+    @with_appcontext
+    def run(self, days, every):
+        """
+        Fails reports whose job has not finished within REPORT_JOB_TIMEOUT and
+        deletes reports older than the retention period. With --every, run it
+        as a single dedicated process rather than inside every web worker.
+        """
+        retention_days = days if days is not None else current_app.config['REPORT_RETENTION_DAYS']
+        while True:
+            try:
+                failed = fail_stale_reports(current_app.config['REPORT_JOB_TIMEOUT'])
+                click.echo(f"Failed {failed} stale report job(s).")
+                deleted = sweep_expired_reports(retention_days)
+                click.echo(f"Deleted {deleted} expired report(s).")
+            except Exception:
+                if not every:
+                    raise
+                db.session.rollback()
+                logger.exception("Report retention sweep failed.")
+
+            if not every:
+                break
+            time.sleep(every)
+
+
+class AdoptReportFilesCommand(click.Command):
+    def __init__(self):
+        super().__init__(
+            name='adopt-report-files',
+            help="Move report files from the old static/reports folder into report storage.",
+            callback=self.run
+        )
+
+    @with_appcontext
+    def run(self):
+        """Gives reports generated before report storage existed a storage key, so they can be downloaded."""
+        adopted, missing = adopt_legacy_report_files()
+        click.echo(f"Adopted {adopted} report file(s), {missing} missing.")
@@ -0,0 +1,35 @@
+import click
+from flask.cli import with_appcontext
+
+from budgetron.services.rollup_service import rebuild_rollups, verify_rollups
+
+
+class RollupsCommand(click.Command):
+    def __init__(self):
+        super().__init__(
+            name='rollups',
+            help="Maintain monthly totals: flask rollups [rebuild|verify]",
+            params=[
+                click.Argument(['action'], type=click.Choice(['rebuild', 'verify']), default='verify', required=False),
+                click.Option(['--user-id'], type=int, default=None, help='Only process this user'),
+            ],
+            callback=self.run
+        )
+
+    @with_appcontext
+    def run(self, action, user_id):
+        """Rebuilds the monthly rollups from raw transactions, or checks them against it."""
+        if action == 'rebuild':
+            written = rebuild_rollups(user_id)
+            click.echo(f"Rebuilt {written} monthly total(s).")
+
+        mismatches = verify_rollups(user_id)
+        for (row_user_id, category_id, month), expected, actual in mismatches:
+            click.echo(
+                f"user={row_user_id} category={category_id} month={month}: "
+                f"expected {expected}, found {actual}"
+            )
+
+        if mismatches:
+            raise click.ClickException(f"{len(mismatches)} monthly total(s) do not match transactions.")
+        click.echo("Monthly totals match transactions.")
@@ -19,3 +19,19 @@ class Config:
     # JWT Authentication Configuration
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=30)
+
+    # Background report generation
+    REPORT_WORKERS = int(os.getenv("REPORT_WORKERS") or 2)
+    REPORT_QUEUE_SIZE = int(os.getenv("REPORT_QUEUE_SIZE") or 20)
+    REPORT_JOB_TIMEOUT = int(os.getenv("REPORT_JOB_TIMEOUT") or 600)  # seconds a queued report is awaited
+
+    # Report file storage and retention
+    REPORT_STORAGE_DIR = os.getenv("REPORT_STORAGE_DIR")
+    REPORT_SENDFILE = os.getenv("REPORT_SENDFILE")  # 'x-sendfile', 'x-accel' or unset
+    REPORT_ACCEL_PREFIX = os.getenv("REPORT_ACCEL_PREFIX") or "/protected/reports"
+    REPORT_RETENTION_DAYS = int(os.getenv("REPORT_RETENTION_DAYS") or 30)
+
+    # Budget alerts, as percentages of the budget amount
+    BUDGET_ALERT_THRESHOLDS = [
+        int(threshold) for threshold in (os.getenv("BUDGET_ALERT_THRESHOLDS") or "80,100").split(",")
+    ]
@@ -1,6 +1,14 @@
+from functools import cached_property
+
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
 from budgetron.utils.security import bcrypt
 from budgetron.utils.db import db
 
+# Text search configuration of transaction descriptions. 'simple' does not stem
+# words, so prefix searches match merchant names as typed.
+SEARCH_CONFIG = 'simple'
+
 
 class Role(db.Model):
     __tablename__ = 'roles'
@@ -14,7 +22,9 @@ class Role(db.Model):
 user_roles = db.Table(
     'user_roles',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id')),
-    db.Column('role_id', db.Integer, db.ForeignKey('roles.id'))
+    db.Column('role_id', db.Integer, db.ForeignKey('roles.id')),
+    db.Index('ix_user_roles_user_id_role_id', 'user_id', 'role_id'),
+    db.Index('ix_user_roles_role_id', 'role_id'),
 )
 
 
@@ -30,9 +40,9 @@ class User(db.Model):
     transactions = db.relationship('Transaction', backref='user', lazy='dynamic')
     reports = db.relationship('Report', backref='user', lazy='dynamic')
 
-    @property
+    @cached_property
     def is_admin(self):
-        """Checks whether the user is an admin."""
+        """Checks whether the user is an admin. Loaded once per instance, so once per request."""
         return any(role.name == 'admin' for role in self.roles)
 
     def __repr__(self):
@@ -60,6 +70,9 @@ class Category(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('name', 'user_id', name='uq_category_name_user'),
+        # Listings show default categories and the user's own, sorted by name
+        db.Index('ix_categories_user_id_name', 'user_id', 'name'),
+        db.Index('ix_categories_default_name', 'name', postgresql_where=db.text('is_default')),
     )
 
     def __repr__(self):
@@ -67,13 +80,37 @@ class Category(db.Model):
 
 
 class Transaction(db.Model):
+    """
+    A transaction. The table is range-partitioned by `timestamp` month, see
+    services/partition_service.py, so its primary key includes `timestamp`.
+    """
     __tablename__ = 'transactions'
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)  # Minor units, see utils/money.py
     description = db.Column(db.Text, nullable=False)
-    timestamp = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    timestamp = db.Column(db.DateTime, server_default=db.func.now(), nullable=False, primary_key=True)
+    # Searchable form of the description, maintained by Postgres and only loaded when requested
+    search_vector = db.deferred(db.Column(
+        TSVECTOR, db.Computed(f"to_tsvector('{SEARCH_CONFIG}', description)", persisted=True)
+    ))
+
+    # Fetch the server-generated timestamp on insert so derived data can be updated.
+    # Ids are unique on their own, so the ORM identifies transactions by id alone.
+    __mapper_args__ = {'eager_defaults': True, 'primary_key': [id]}
+
+    # Serve per-user date range filters and ordering by timestamp
+    __table_args__ = (
+        db.Index('ix_transactions_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_transactions_user_category_timestamp', 'user_id', 'category_id', 'timestamp'),
+        db.Index('ix_transactions_category_timestamp', 'category_id', 'timestamp'),
+        db.Index('ix_transactions_timestamp', 'timestamp'),
+        db.Index('ix_transactions_search_vector', 'search_vector', postgresql_using='gin'),
+        # The trigram index on description needs the pg_trgm extension, so it
+        # is only created by the transaction_search migration where available
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
 
     def __repr__(self):
         return f'<Transaction {self.id}>'
@@ -83,9 +120,39 @@ class Report(db.Model):
     __tablename__ = 'reports'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    month = db.Column(db.String(7), nullable=True)
+    end_month = db.Column(db.String(7), nullable=True)
     format = db.Column(db.String(10), nullable=False)
-    file_url = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    mode = db.Column(db.String(10), nullable=False, server_default='detailed')
+    status = db.Column(
+        db.Enum('pending', 'running', 'done', 'failed', name='report_status'),
+        nullable=False,
+        server_default='pending',
+    )
+    file_url = db.Column(db.Text, nullable=True)
+    storage_key = db.Column(db.String(255), nullable=True)
+    etag = db.Column(db.String(64), nullable=True)
+    row_count = db.Column(db.Integer, nullable=True)
+    file_size = db.Column(db.BigInteger, nullable=True)
+    data_version = db.Column(db.Integer, nullable=True)
+    duration = db.Column(db.Float, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    # Reports are paged by (created_at, id), which a NULL would break
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def period(self):
+        """The month, or `<start>_<end>` month range, covered by the report."""
+        if self.end_month in (None, self.month):
+            return self.month
+        return f"{self.month}_{self.end_month}"
+
+    __table_args__ = (
+        db.Index('ix_reports_cache_key', 'user_id', 'month', 'end_month', 'format', 'mode', 'data_version'),
+        db.Index('ix_reports_user_created_at', 'user_id', 'created_at'),
+        db.Index('ix_reports_created_at', 'created_at'),
+    )
 
 
 class Budget(db.Model):
@@ -94,8 +161,55 @@ class Budget(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     month = db.Column(db.String(7), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)  # Minor units
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
-    __table_args__ = (db.UniqueConstraint('user_id', 'category_id', 'month', name='unique_budget'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'category_id', 'month', name='unique_budget'),
+        db.Index('ix_budgets_user_month', 'user_id', 'month'),
+        db.Index('ix_budgets_month', 'month'),
+        db.Index('ix_budgets_category_id', 'category_id'),
+    )
+
+
+class BudgetAlert(db.Model):
+    """An event recorded when spending crosses a threshold of a budget."""
+    __tablename__ = 'budget_alerts'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    budget_id = db.Column(db.Integer, db.ForeignKey('budgets.id', ondelete='CASCADE'), nullable=False)
+    threshold = db.Column(db.Integer, nullable=False)  # Percentage of the budget amount
+    spent = db.Column(db.BigInteger, nullable=False)  # Minor units
+    amount = db.Column(db.BigInteger, nullable=False)  # Minor units
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    # Id of the database transaction that wrote the alert
+    xact_id = db.Column(db.BigInteger, server_default=db.text('pg_current_xact_id()::text::bigint'), nullable=False)
+
+    budget = db.relationship('Budget', backref=db.backref('alerts', passive_deletes=True))
+
+    # Alerts are read per user with a (xact_id, id) cursor
+    __table_args__ = (
+        db.Index('ix_budget_alerts_user_xact_id_id', 'user_id', 'xact_id', 'id'),
+    )
+
+
+class MonthlyCategoryTotal(db.Model):
+    """
+    Per-month, per-category transaction totals of a user, kept up to date
+    by every transaction write.
+    """
+    __tablename__ = 'monthly_category_totals'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)
+    total = db.Column(db.BigInteger, nullable=False, default=0)  # Minor units
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DataVersion(db.Model):
+    """A change counter bumped whenever the data behind `key` is modified."""
+    __tablename__ = 'data_versions'
+    key = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
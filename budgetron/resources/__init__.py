@@ -1,7 +1,7 @@
 from .auth import LoginResource, RegisterResource
 from .user import UserListResource, UserDetailResource
 from .profile import ProfileResource
-from .transaction import TransactionListResource, TransactionDetailResource
+from .transaction import TransactionListResource, TransactionDetailResource, TransactionImportResource, TransactionExportResource, TransactionStatsResource
 from .category import CategoryListResource, CategoryDetailResource
-from .report import ReportListResource, ReportDetailResource
-from .budget import BudgetListResource, BudgetDetailResource
+from .report import ReportListResource, ReportDetailResource, ReportCacheResource, ReportSummaryResource, ReportDownloadResource
+from .budget import BudgetListResource, BudgetDetailResource, BudgetAlertListResource, BudgetBulkResource, BudgetDashboardResource
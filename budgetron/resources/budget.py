@@ -1,52 +1,99 @@
-from datetime import datetime
-
 from flask import request, g
 from flask_jwt_extended import jwt_required
 from flask_restful import Resource, abort
 from marshmallow import ValidationError
+from marshmallow.experimental.context import Context
+from sqlalchemy import BigInteger, Text, cast, func, tuple_
 
-from budgetron.models import Budget, User
-from budgetron.schemas import BudgetSchema
+from budgetron.models import Budget, BudgetAlert, Category, User
+from budgetron.schemas import (
+    BudgetSchema, BudgetAlertSchema, BudgetBulkSchema, BudgetBulkItemSchema, BudgetDashboardSchema
+)
+from budgetron.services.budget_service import budget_dashboard, budget_dump_context, copy_budgets, upsert_budgets
 from budgetron.utils.db import db
+from budgetron.utils.etags import (
+    check_if_match, compound_etag, conditional_json, conditional_list, etag_headers, lock_if_match,
+)
+from budgetron.utils.lookups import get_by_id, get_many
+from budgetron.utils.money import to_major, to_minor
+from budgetron.utils.months import current_month, parse_month
 from budgetron.utils.permissions import is_owner_or_admin
-from budgetron.utils.paginate import paginate_query
+from budgetron.utils.paginate import decode_cursor, encode_cursor, paginate_query
+from budgetron.utils.versioning import bump_versions, list_key
 
 budget_schema = BudgetSchema()
 budgets_schema = BudgetSchema(many=True)
+budget_state_schema = BudgetSchema(exclude=('spent', 'remaining', 'overspent'))
+budget_alerts_schema = BudgetAlertSchema(many=True)
+budget_bulk_schema = BudgetBulkSchema()
+budget_bulk_item_schema = BudgetBulkItemSchema()
+budget_dashboard_schema = BudgetDashboardSchema()
+
+# Largest page of alerts returned at once
+MAX_ALERTS_LIMIT = 100
+
+
+def dump_budget(budget):
+    """Serialize a single budget, computing its spending once."""
+    with Context(budget_dump_context([budget])):
+        return budget_schema.dump(budget)
+
+
+def budget_etag(budget, data):
+    """
+    ETag of a budget representation. Its spending changes with the category's
+    transactions, so `If-Match` only compares the budget's own fields.
+    """
+    return compound_etag(budget_state_schema.dump(budget), data)
+
+
+def settled_xact_id():
+    """
+    Return the oldest database transaction id still running when the current
+    snapshot was taken. Alerts written by lower ids are committed or gone for
+    good, and any alert committed later has a higher id.
+    """
+    return cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger)
+
+
+def budget_list_keys(user_id):
+    """Budgets are listed with their spending, so both versions apply."""
+    return [list_key('budgets', user_id), list_key('transactions', user_id)]
 
 
 class BudgetListResource(Resource):
     @jwt_required()
+    @conditional_list(budget_list_keys)
     def get(self):
-        """List all budgets."""
+        """List all budgets. Unchanged lists are answered with 304."""
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 10, type=int)
         query = Budget.query
 
         # Optional budget filters
         month = request.args.get('month')
-        min_amount = request.args.get('min_amount')
-        max_amount = request.args.get('max_amount')
+        min_amount = request.args.get('min_amount', type=to_minor)
+        max_amount = request.args.get('max_amount', type=to_minor)
 
         if not g.user.is_admin:
             query = query.filter_by(user_id=g.user.id)
 
         if month:
             try:
-                month_date = datetime.fromisoformat(month)
-                query = query.filter_by(month=month_date)
+                parse_month(month)
+                query = query.filter_by(month=month)
             except ValueError:
                 return abort(400, message="Invalid month date format. Use the format (YYYY-MM).")
 
-        if min_amount:
+        if min_amount is not None:
             query = query.filter(Budget.amount >= min_amount)
 
-        if max_amount:
+        if max_amount is not None:
             query = query.filter(Budget.amount <= max_amount)
 
         # Order by budget month
         query = query.order_by(Budget.month.desc())
-        budgets = paginate_query(query, budgets_schema, page, limit)
+        budgets = paginate_query(query, budgets_schema, page, limit, dump_context=budget_dump_context)
 
         return budgets, 200
 
@@ -68,9 +115,10 @@ class BudgetListResource(Resource):
             
             new_budget = Budget(**budget_data)
             db.session.add(new_budget)
+            bump_versions(list_key('budgets', new_budget.user_id))
             db.session.commit()
 
-            return budget_schema.dump(new_budget), 201
+            return dump_budget(new_budget), 201
 
         except ValidationError as err:
             return {"errors": err.messages}, 400
@@ -80,26 +128,29 @@ class BudgetDetailResource(Resource):
     @jwt_required()
     @is_owner_or_admin(Budget, id_kwarg="budget_id", object_arg="budget")
     def get(self, budget):
-        """Get a single budget."""
-        return budget_schema.dump(budget), 200
+        """Get a single budget. Unchanged budgets are answered with 304."""
+        # No Last-Modified: updated_at does not cover the spending
+        data = dump_budget(budget)
+        return conditional_json(data, etag=budget_etag(budget, data))
     
     @jwt_required()
     @is_owner_or_admin(Budget, id_kwarg="budget_id", object_arg="budget")
     def patch(self, budget):
-        """Partially update a single budget."""
+        """Partially update a single budget, if it still matches the `If-Match` ETag when given."""
+        lock_if_match(budget)
+        check_if_match(budget_state_schema.dump(budget))
         try:
             data = request.get_json()
             budget_data = budget_schema.load(data,  partial=True)
+            owner_id = budget.user_id
 
             if "user_id" in budget_data:
-                existing = User.query.filter_by(user_id=budget_data["user_id"])
-                if not existing:
+                if get_by_id(User, budget_data["user_id"]) is None:
                     abort(404, message="User not found.")
                 budget.user_id = budget_data["user_id"]
 
             if "category_id" in budget_data:
-                existing = User.query.filter_by(category_id=budget_data["category_id"])
-                if not existing:
+                if get_by_id(Category, budget_data["category_id"]) is None:
                     abort(404, message="Category not found.")
                 budget.category_id = budget_data["category_id"]
 
@@ -109,8 +160,10 @@ class BudgetDetailResource(Resource):
             if "amount" in budget_data:
                 budget.amount = budget_data["amount"]
 
+            bump_versions(list_key('budgets', owner_id), list_key('budgets', budget.user_id))
             db.session.commit()
-            return budget_schema.dump(budget), 200
+            updated = dump_budget(budget)
+            return updated, 200, etag_headers(updated, budget_etag(budget, updated))
         
         except ValidationError as err:
             return {"errors": err.messages}, 400
@@ -121,5 +174,148 @@ class BudgetDetailResource(Resource):
     def delete(self, budget):
         """Delete a single budget."""
         db.session.delete(budget)
+        bump_versions(list_key('budgets', budget.user_id))
         db.session.commit()
         return "", 204
+
+
+class BudgetBulkResource(Resource):
+    @jwt_required()
+    def post(self):
+        """
+        Create or update many budgets at once, or copy the budgets of one month
+        to another. Existing budgets for the same category and month are
+        updated. Returns a result per budget.
+        """
+        try:
+            data = budget_bulk_schema.load(request.get_json())
+        except ValidationError as err:
+            return {"errors": err.messages}, 400
+
+        user_id = data.get('user_id', g.user.id)
+        if user_id != g.user.id and not g.user.is_admin:
+            return {"error": "You can only manage your own budgets."}, 403
+
+        if 'from_month' in data:
+            if get_by_id(User, user_id) is None:
+                abort(404, message="User not found.")
+
+            copied = copy_budgets(user_id, data['from_month'], data['to_month'])
+            db.session.commit()
+            results = [
+                {'id': budget_id, 'category_id': category_id, 'month': data['to_month'],
+                 'status': 'created' if inserted else 'updated'}
+                for budget_id, category_id, inserted in copied
+            ]
+            return bulk_response(results), 200
+
+        results = []
+        items = {}
+        for index, item in enumerate(data['budgets']):
+            try:
+                budget = budget_bulk_item_schema.load(item)
+            except ValidationError as err:
+                results.append({'index': index, 'status': 'error', 'errors': err.messages})
+                continue
+
+            budget.setdefault('user_id', user_id)
+            results.append({'index': index, **budget, 'amount': to_major(budget['amount'])})
+            items[index] = budget
+
+        # Validate every referenced id with one query per table
+        existing_users = get_many(User, {budget['user_id'] for budget in items.values()})
+        categories = get_many(Category, {budget['category_id'] for budget in items.values()})
+
+        rows = {}
+        for index, budget in items.items():
+            category = categories.get(budget['category_id'])
+            if budget['user_id'] != g.user.id and not g.user.is_admin:
+                error = {'user_id': ["You can only manage your own budgets."]}
+            elif budget['user_id'] not in existing_users:
+                error = {'user_id': ["User does not exist."]}
+            elif category is None or not (category.is_default or category.user_id == budget['user_id']):
+                error = {'category_id': ["Category does not exist."]}
+            else:
+                error = None
+
+            key = (budget['user_id'], budget['category_id'], budget['month'])
+            if error is None and key in rows:
+                # A row can only be upserted once per statement, the last one wins
+                results[rows[key]].update(status='error', errors={'month': ["Duplicate budget in request."]})
+            if error:
+                results[index].update(status='error', errors=error)
+            else:
+                rows[key] = index
+
+        written = upsert_budgets([items[index] for index in rows.values()])
+        db.session.commit()
+        for key, index in rows.items():
+            budget_id, inserted = written[key]
+            results[index].update(id=budget_id, status='created' if inserted else 'updated')
+
+        return bulk_response(results), 200
+
+
+def bulk_response(results):
+    """Summarize per-budget results of a bulk request."""
+    statuses = [result['status'] for result in results]
+    return {
+        'created': statuses.count('created'),
+        'updated': statuses.count('updated'),
+        'failed': statuses.count('error'),
+        'results': results,
+    }
+
+
+class BudgetDashboardResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+        Get the budget overview of a month: budgets with their spending,
+        unbudgeted spending and income vs expense totals. Responses carry an
+        ETag, and unchanged dashboards are answered with 304.
+        """
+        month = request.args.get('month') or current_month()
+        try:
+            parse_month(month)
+        except ValueError:
+            return abort(400, message="Invalid month date format. Use the format (YYYY-MM).")
+
+        dashboard = budget_dashboard(g.user.id, month)
+        return conditional_json(budget_dashboard_schema.dump(dashboard))
+
+
+class BudgetAlertListResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+        List budget alerts recorded after the `since` cursor, oldest first.
+        Pass the returned `next_since` back to fetch only newer alerts.
+
+        Alerts are ordered by `(xact_id, id)`, the database transaction that
+        wrote them first, and listed once that transaction is older than any
+        still running. Ids and timestamps are assigned before commit, so an
+        alert committed after a newer one could otherwise fall behind a
+        cursor that already moved past it, however long its transaction ran.
+        """
+        since = request.args.get('since')
+        limit = max(min(request.args.get('limit', 50, type=int), MAX_ALERTS_LIMIT), 1)
+        budget_id = request.args.get('budget_id', type=int)
+        columns = [BudgetAlert.xact_id, BudgetAlert.id]
+        query = BudgetAlert.query.filter(BudgetAlert.xact_id < settled_xact_id())
+
+        if since:
+            _, position = decode_cursor(since, columns)
+            query = query.filter(tuple_(*columns) > tuple_(*position))
+
+        if not g.user.is_admin:
+            query = query.filter_by(user_id=g.user.id)
+
+        if budget_id:
+            query = query.filter_by(budget_id=budget_id)
+
+        alerts = query.order_by(*columns).limit(limit).all()
+        return {
+            'items': budget_alerts_schema.dump(alerts),
+            'next_since': encode_cursor('next', alerts[-1], columns) if alerts else since,
+        }, 200
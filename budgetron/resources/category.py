@@ -5,19 +5,31 @@ from marshmallow import ValidationError
 
 from budgetron.models import Category, User
 from budgetron.schemas import CategorySchema
+from budgetron.services.transaction_service import record_category_change
 from budgetron.utils.db import db
+from budgetron.utils.etags import (
+    check_if_match, conditional_json, conditional_list, etag_headers, lock_if_match,
+)
+from budgetron.utils.lookups import get_by_id
 from budgetron.utils.paginate import paginate_query
+from budgetron.utils.versioning import bump_versions, list_key
 
 # Category schema
 category_schema = CategorySchema()
 categories_schema = CategorySchema(many=True)
 
 
+def category_list_key(category):
+    """Version key of the list a category appears in: every user's, or its owner's."""
+    return list_key('categories', 'default' if category.is_default else category.user_id)
+
+
 class CategoryListResource(Resource):
     @jwt_required()
+    @conditional_list(lambda user_id: [list_key('categories', 'default'), list_key('categories', user_id)])
     def get(self):
         """
-        List categories.
+        List categories. Unchanged lists are answered with 304.
         - Admins see all categories
         - Users see default + their own
         """
@@ -68,6 +80,7 @@ class CategoryListResource(Resource):
 
 
             db.session.add(new_category)
+            bump_versions(category_list_key(new_category))
             db.session.commit()
             return category_schema.dump(new_category), 201
 
@@ -78,7 +91,7 @@ class CategoryListResource(Resource):
 class CategoryDetailResource(Resource):
     @jwt_required()
     def get(self, category_id):
-        category = Category.query.filter_by(id=category_id).first()
+        category = get_by_id(Category, category_id)
         if category is None:
             abort(404, message="Category not found.")
 
@@ -86,12 +99,12 @@ class CategoryDetailResource(Resource):
         if not g.user.is_admin and not (category.is_default or category.user_id == g.user.id):
             abort(404, message="Category not found.")
 
-        return category_schema.dump(category), 200
+        return conditional_json(category_schema.dump(category), last_modified=category.updated_at)
 
 
     @jwt_required()
     def patch(self, category_id):
-        category = Category.query.filter_by(id=category_id).first()
+        category = get_by_id(Category, category_id)
         if category is None:
             abort(404, message="Category not found.")
 
@@ -99,6 +112,8 @@ class CategoryDetailResource(Resource):
         if not g.user.is_admin and category.user_id != g.user.id:
             abort(404, message="Category not found.")
 
+        lock_if_match(category)
+        check_if_match(category_schema.dump(category))
         try:
             data = request.get_json()
             category_data = category_schema.load(data, partial=True)
@@ -115,21 +130,30 @@ class CategoryDetailResource(Resource):
 
                 if existing:
                     return {"error": "Category with this name already exists."}, 409
-                
+
+                # Reports show category names
+                if name != category.name:
+                    record_category_change(category.id)
                 category.name = name
 
             if "type" in category_data:
+                # Stats, budget spending and the transaction type filter
+                # count the category differently, for every user of it
+                if category_data["type"] != category.type:
+                    record_category_change(category.id, lists=True)
                 category.type = category_data["type"]
 
+            bump_versions(category_list_key(category))
             db.session.commit()
-            return category_schema.dump(category), 200
+            updated = category_schema.dump(category)
+            return updated, 200, etag_headers(updated)
 
         except ValidationError as err:
             return {"errors": err.messages}, 400
 
     @jwt_required()
     def delete(self, category_id):
-        category = Category.query.filter_by(id=category_id).first()
+        category = get_by_id(Category, category_id)
         if category is None:
             abort(404, message="Category not found.")
 
@@ -138,5 +162,6 @@ class CategoryDetailResource(Resource):
             abort(404, message="Category not found.")
 
         db.session.delete(category)
+        bump_versions(category_list_key(category))
         db.session.commit()
         return "", 204
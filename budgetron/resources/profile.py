@@ -3,6 +3,7 @@ from flask_restful import Resource
 
 from budgetron.models import User
 from budgetron.schemas import UserSchema
+from budgetron.utils.lookups import get_by_id
 
 user_schema = UserSchema()
 
@@ -11,7 +12,7 @@ class ProfileResource(Resource):
     @jwt_required()
     def get(self):
         user_id = get_jwt_identity()
-        user = User.query.filter_by(id=user_id).first()
+        user = get_by_id(User, int(user_id))
         if user is None:
             return {"error": "User not found."}, 404
 
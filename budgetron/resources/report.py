@@ -1,21 +1,27 @@
 from datetime import datetime
 
-from flask import request, g
+from flask import request, g, url_for
 from flask_restful import Resource, abort
 from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 
 from budgetron.models import Report, User
-from budgetron.schemas import ReportSchema, ReportInputSchema
-from budgetron.services.report_service import generate_transaction_summary, save_csv_report
+from budgetron.schemas import ReportSchema, ReportInputSchema, ReportSummarySchema
+from budgetron.services.report_cache import find_cached_report, report_cache_stats, report_data_version
+from budgetron.services.report_service import has_transactions, run_report_job, summarize_transactions
+from budgetron.services.report_storage import delete_report_file, send_report_file
 from budgetron.utils.db import db
-from budgetron.utils.paginate import paginate_query
+from budgetron.utils.jobs import report_queue, QueueFullError
+from budgetron.utils.jwt import roles_required
+from budgetron.utils.lookups import get_by_id
+from budgetron.utils.paginate import paginate_keyset, paginate_query
 from budgetron.utils.permissions import is_owner_or_admin
 
 # Report schema
 report_schema = ReportSchema()
 reports_schema = ReportSchema(many=True)
 report_input_schema = ReportInputSchema()
+report_summary_schema = ReportSummarySchema()
 
 
 class ReportListResource(Resource):
@@ -31,12 +37,16 @@ class ReportListResource(Resource):
 
         # Optional report filters
         report_format = request.args.get('format', type=str)
+        status = request.args.get('status', type=str)
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
         if report_format:
             query = query.filter_by(format=report_format)
 
+        if status:
+            query = query.filter_by(status=status)
+
         if start_date:
             try:
                 start = datetime.fromisoformat(start_date)
@@ -54,45 +64,97 @@ class ReportListResource(Resource):
         # Sort by descending created at
         query = query.order_by(Report.created_at.desc())
 
-        reports = paginate_query(query, reports_schema, page, limit)
+        if 'cursor' in request.args:
+            reports = paginate_keyset(query, reports_schema, [Report.created_at, Report.id], request.args['cursor'], limit)
+        else:
+            count = 'estimate' if g.user.is_admin else 'exact'
+            reports = paginate_query(query, reports_schema, page, limit, count=count)
         return reports, 200
 
     @jwt_required()
     def post(self):
-        """Generate a new financial report from user transactions."""
+        """
+        Queue a new financial report for generation from user transactions.
+        Returns the pending report, which can be polled until it is done.
+        Reports already generated from unchanged data are returned as is.
+        """
         try:
             data = request.get_json()
             report_data = report_input_schema.load(data)
-            month = report_data['month']
+            start_month = report_data['start_month']
+            end_month = report_data['end_month']
             report_format = report_data['format']
+            mode = report_data['mode']
 
             user_id = data.get('user_id', g.user.id)
 
             if not g.user.is_admin and user_id != g.user.id:
                 abort(403, message="Unauthorized.")
 
-            # TODO: Add support for exporting reports in pdf or xlsx format.
-            if report_format != 'csv':
-                abort(400, message="Only CSV format is supported for now.")
+            data_version = report_data_version(user_id, start_month, end_month)
+            cached = find_cached_report(user_id, start_month, end_month, report_format, mode, data_version)
+            if cached:
+                status_code = 200 if cached.status == 'done' else 202
+                return report_schema.dump(cached), status_code, {'X-Cache': 'HIT'}
 
-            rows = generate_transaction_summary(user_id=user_id, month=month)
-            if not rows:
+            if not has_transactions(user_id, start_month, end_month):
                 abort(404, message="No transactions found.")
 
-            file_url = save_csv_report(user_id, rows, month)
-            if not file_url:
-                abort(500, message="Server error: Unable to save report.")
-
-            report = Report(user_id=user_id, format=report_format, file_url=file_url)
+            report = Report(
+                user_id=user_id,
+                month=start_month,
+                end_month=end_month,
+                format=report_format,
+                mode=mode,
+                status='pending',
+                data_version=data_version,
+            )
             db.session.add(report)
             db.session.commit()
 
-            return report_schema.dump(report), 201
+            try:
+                report_queue.submit(run_report_job, report.id, request.host_url)
+            except QueueFullError:
+                db.session.delete(report)
+                db.session.commit()
+                return {"message": "Too many reports are being generated. Please try again later."}, 503, {
+                    'Retry-After': '30'
+                }
+
+            location = url_for('reportdetailresource', report_id=report.id)
+            return report_schema.dump(report), 202, {'Location': location, 'X-Cache': 'MISS'}
 
         except ValidationError as err:
             return {"errors": err.messages}, 400
 
 
+class ReportSummaryResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+        Gets aggregated totals of a user's transactions for a `month`,
+        or for a `start_month`..`end_month` range.
+        """
+        try:
+            period = report_input_schema.load(request.args, partial=('format',))
+        except ValidationError as err:
+            return {"errors": err.messages}, 400
+
+        user_id = period.get('user_id') or g.user.id
+        if not g.user.is_admin and user_id != g.user.id:
+            abort(403, message="Unauthorized.")
+
+        summary = summarize_transactions(user_id, period['start_month'], period['end_month'])
+        return report_summary_schema.dump(summary), 200
+
+
+class ReportCacheResource(Resource):
+    @roles_required('admin')
+    def get(self):
+        """Gets the report cache hit/miss counters of this worker."""
+        return report_cache_stats.to_dict(), 200
+
+
 class ReportDetailResource(Resource):
     @jwt_required()
     @is_owner_or_admin(Report, id_kwarg="report_id", object_arg="report")
@@ -109,7 +171,7 @@ class ReportDetailResource(Resource):
             report_data = report_schema.load(data, partial=True)
 
             if "user_id" in report_data:
-                existing = User.query.filter_by(id=report_data["user_id"]).first()
+                existing = get_by_id(User, report_data["user_id"])
                 if not existing:
                     abort(404, message="User not found.")
                 report.user_id = report_data["user_id"]
@@ -129,7 +191,20 @@ class ReportDetailResource(Resource):
     @jwt_required()
     @is_owner_or_admin(Report, id_kwarg="report_id", object_arg="report")
     def delete(self, report):
-        """Deletes a single report."""
+        """Deletes a single report and its file."""
+        storage_key = report.storage_key
         db.session.delete(report)
         db.session.commit()
+        delete_report_file(storage_key)
         return "", 204
+
+
+class ReportDownloadResource(Resource):
+    @jwt_required()
+    @is_owner_or_admin(Report, id_kwarg="report_id", object_arg="report")
+    def get(self, report):
+        """Downloads the file of a generated report."""
+        if report.status != 'done':
+            abort(409, message="Report is not ready yet.")
+
+        return send_report_file(report)
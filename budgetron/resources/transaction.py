@@ -1,25 +1,96 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from flask import request, g
+from flask import Response, g, request, stream_with_context
 from flask_jwt_extended import jwt_required
 from flask_restful import Resource, abort
 from marshmallow import ValidationError
 
 from budgetron.models import Transaction, User, Category
-from budgetron.schemas import TransactionSchema
+from budgetron.schemas import TransactionSchema, TransactionStatsSchema
+from budgetron.services.export_service import EXPORT_CONTENT_TYPES, EXPORT_FORMATS, stream_transactions
+from budgetron.services.import_service import IMPORT_FORMATS, ImportFormatError, import_transactions
+from budgetron.services.search_service import DEFAULT_SEARCH_MODE, SEARCH_MODES, search_transactions
+from budgetron.services.stats_service import (
+    MAX_STATS_BUCKETS, STATS_GROUPS, STATS_INTERVALS, bucket_count, columnar, default_start, to_naive,
+    transaction_stats
+)
+from budgetron.services.transaction_service import record_transaction_change, snapshot
 from budgetron.utils.db import db
-from budgetron.utils.paginate import paginate_query
+from budgetron.utils.etags import (
+    check_if_match, conditional_json, conditional_list, etag_headers, lock_if_match,
+)
+from budgetron.utils.logging_utils import log_event
+from budgetron.utils.lookups import get_by_id
+from budgetron.utils.money import to_minor
+from budgetron.utils.paginate import paginate_keyset, paginate_query
 from budgetron.utils.permissions import is_owner_or_admin
+from budgetron.utils.versioning import list_key
 
 # Transaction schema
 transaction_schema = TransactionSchema()
 transactions_schema = TransactionSchema(many=True)
+transaction_stats_schema = TransactionStatsSchema()
+
+
+def filter_transactions(query, args):
+    """
+    Apply the transaction list filters given as request `args` to `query`.
+    Returns the filtered query and the search rank expression, or None
+    when there is no ranked search. Aborts with 400 on invalid filters.
+    """
+    category_id = args.get('category_id', type=int)
+    transaction_type = args.get('type')
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    min_amount = args.get('min_amount', type=to_minor)
+    max_amount = args.get('max_amount', type=to_minor)
+    search = args.get('search', type=str)
+    search_mode = args.get('search_mode') or DEFAULT_SEARCH_MODE
+    rank = None
+
+    if category_id:
+        query = query.filter_by(category_id=category_id)
+
+    if transaction_type:
+        query = query.join(Transaction.category).filter_by(type=transaction_type)
+
+    if start_date:
+        try:
+            start = datetime.fromisoformat(start_date)
+            query = query.filter(Transaction.timestamp >= start)
+        except ValueError:
+            abort(400, message="Invalid start date format. Use ISO format (YYYY-MM-DD).")
+
+    if end_date:
+        try:
+            end = datetime.fromisoformat(end_date)
+            if len(end_date) == len('YYYY-MM-DD'):
+                # Include the whole end day, as a half-open range
+                query = query.filter(Transaction.timestamp < end + timedelta(days=1))
+            else:
+                query = query.filter(Transaction.timestamp <= end)
+        except ValueError:
+            abort(400, message="Invalid end date format. Use ISO format (YYYY-MM-DD).")
+
+    if min_amount is not None:
+        query = query.filter(Transaction.amount >= min_amount)
+
+    if max_amount is not None:
+        query = query.filter(Transaction.amount <= max_amount)
+
+    if search:
+        if search_mode not in SEARCH_MODES:
+            abort(400, message=f"Invalid search mode. Use one of: {', '.join(SEARCH_MODES)}.")
+        query, rank = search_transactions(query, search, search_mode)
+
+    return query, rank
 
 
 class TransactionListResource(Resource):
     @jwt_required()
+    @conditional_list(lambda user_id: [list_key('transactions', user_id)])
     def get(self):
-        """Lists all transactions."""
+        """Lists all transactions. Unchanged lists are answered with 304."""
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 10, type=int)
         query = Transaction.query
@@ -28,48 +99,24 @@ class TransactionListResource(Resource):
         if not g.user.is_admin:
             query = query.filter_by(user_id=g.user.id)
 
-        # Optional transaction filters
-        category_id = request.args.get('category_id', type=int)
-        transaction_type = request.args.get('type')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        min_amount = request.args.get('min_amount', type=float)
-        max_amount = request.args.get('max_amount', type=float)
-        search = request.args.get('search', type=str)
-
-        if category_id:
-            query = query.filter_by(category_id=category_id)
-
-        if transaction_type:
-            query = query.join(Transaction.category).filter_by(type=transaction_type)
-
-        if start_date:
-            try:
-                start = datetime.fromisoformat(start_date)
-                query = query.filter(Transaction.timestamp >= start)
-            except ValueError:
-                return abort(400, message="Invalid start date format. Use ISO format (YYYY-MM-DD).")
-
-        if end_date:
-            try:
-                end = datetime.fromisoformat(end_date)
-                query = query.filter(Transaction.timestamp <= end)
-            except ValueError:
-                return abort(400, message="Invalid end date format. Use ISO format (YYYY-MM-DD).")
-
-        if min_amount is not None:
-            query = query.filter(Transaction.amount >= min_amount)
-
-        if max_amount is not None:
-            query = query.filter(Transaction.amount <= max_amount)
-
-        if search:
-            query = query.filter(Transaction.description.ilike(f'%{search}%'))
+        query, rank = filter_transactions(query, request.args)
 
-        # Sort by timestamp descending
-        query = query.order_by(Transaction.timestamp.desc())
+        # Sort by relevance for ranked searches, then by timestamp descending
+        if rank is not None and 'cursor' not in request.args:
+            query = query.order_by(rank.desc(), Transaction.timestamp.desc())
+        else:
+            query = query.order_by(Transaction.timestamp.desc())
 
-        transactions = paginate_query(query=query, schema=transactions_schema, page=page, limit=limit)
+        if 'cursor' in request.args:
+            transactions = paginate_keyset(
+                query, transactions_schema, [Transaction.timestamp, Transaction.id], request.args['cursor'], limit
+            )
+        else:
+            # Counting every user's transactions is costly, admins get an estimate by default
+            count = 'estimate' if g.user.is_admin else 'exact'
+            transactions = paginate_query(
+                query=query, schema=transactions_schema, page=page, limit=limit, count=count
+            )
         return transactions, 200
 
     @jwt_required()
@@ -80,6 +127,9 @@ class TransactionListResource(Resource):
             transaction_data = transaction_schema.load(data)
             new_transaction = Transaction(**transaction_data)
             db.session.add(new_transaction)
+            db.session.flush()
+
+            record_transaction_change(after=snapshot(new_transaction))
             db.session.commit()
             return transaction_schema.dump(new_transaction), 201
 
@@ -91,25 +141,28 @@ class TransactionDetailResource(Resource):
     @jwt_required()
     @is_owner_or_admin(Transaction, id_kwarg="transaction_id", object_arg="transaction")
     def get(self, transaction):
-        """Gets a single transaction."""
-        return transaction_schema.dump(transaction), 200
+        """Gets a single transaction. Unchanged transactions are answered with 304."""
+        return conditional_json(transaction_schema.dump(transaction))
 
     @jwt_required()
     @is_owner_or_admin(Transaction, id_kwarg="transaction_id", object_arg="transaction")
     def patch(self, transaction):
-        """Partially updates a single transaction."""
+        """Partially updates a single transaction, if it still matches the `If-Match` ETag when given."""
+        lock_if_match(transaction)
+        check_if_match(transaction_schema.dump(transaction))
         try:
             data = request.get_json()
             transaction_data = transaction_schema.load(data, partial=True)
+            before = snapshot(transaction)
 
             if "user_id" in transaction_data:
-                existing = User.query.filter_by(id=transaction_data["user_id"]).first()
+                existing = get_by_id(User, transaction_data["user_id"])
                 if not existing:
                     abort(404, message="User not found.")
                 transaction.user_id = transaction_data["user_id"]
 
             if "category_id" in transaction_data:
-                existing = Category.query.filter_by(id=transaction_data["category_id"]).first()
+                existing = get_by_id(Category, transaction_data["category_id"])
                 if not existing:
                     abort(404, message="Category not found.")
                 transaction.category_id = transaction_data["category_id"]
@@ -120,8 +173,11 @@ class TransactionDetailResource(Resource):
             if "description" in transaction_data:
                 transaction.description = transaction_data["description"]
 
+            db.session.flush()
+            record_transaction_change(before=before, after=snapshot(transaction))
             db.session.commit()
-            return transaction_schema.dump(transaction), 200
+            updated = transaction_schema.dump(transaction)
+            return updated, 200, etag_headers(updated)
 
         except ValidationError as err:
             return {"errors": err.messages}, 400
@@ -130,6 +186,122 @@ class TransactionDetailResource(Resource):
     @is_owner_or_admin(Transaction, id_kwarg="transaction_id", object_arg="transaction")
     def delete(self, transaction):
         """Deletes a transaction."""
+        before = snapshot(transaction)
         db.session.delete(transaction)
+        record_transaction_change(before=before)
         db.session.commit()
         return "", 204
+
+
+class TransactionImportResource(Resource):
+    @jwt_required()
+    def post(self):
+        """
+        Import transactions from a CSV or NDJSON file, sent as the `file` field
+        of a multipart form or as the request body. Rows need `category_id`,
+        `amount` and `description`, and may have an ISO `timestamp`. Valid rows
+        are imported and invalid ones reported by row number.
+        """
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        filename = upload.filename if upload and upload.filename else ''
+        content_type = upload.mimetype if upload else request.mimetype
+
+        file_format = request.args.get('format')
+        if not file_format:
+            if filename.endswith(('.ndjson', '.jsonl')) or content_type in ('application/x-ndjson', 'application/jsonl'):
+                file_format = 'ndjson'
+            else:
+                file_format = 'csv'
+        if file_format not in IMPORT_FORMATS:
+            return abort(400, message=f"Invalid import format. Use one of: {', '.join(IMPORT_FORMATS)}.")
+
+        try:
+            result = import_transactions(g.user.id, stream, file_format)
+        except ImportFormatError as err:
+            return abort(400, message=str(err))
+
+        log_event('transactions_imported', details={
+            'imported': result.imported, 'failed': result.failed, 'elapsed': round(result.elapsed, 3),
+        })
+        return {
+            'imported': result.imported,
+            'failed': result.failed,
+            'errors': result.errors,
+            'elapsed': round(result.elapsed, 3),
+        }, 201 if result.imported else 200
+
+
+class TransactionExportResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+        Stream every transaction matching the list filters as NDJSON or CSV,
+        newest first. The body is sent in chunks as rows are read, without a
+        total count or Content-Length.
+        """
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return abort(400, message=f"Invalid export format. Use one of: {', '.join(EXPORT_FORMATS)}.")
+
+        query = Transaction.query
+        if not g.user.is_admin:
+            query = query.filter_by(user_id=g.user.id)
+        query, _ = filter_transactions(query, request.args)
+
+        log_event('transactions_exported', details={'format': export_format})
+        response = Response(
+            stream_with_context(stream_transactions(query, export_format)),
+            mimetype=EXPORT_CONTENT_TYPES[export_format],
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="transactions.{export_format}"'
+        return response
+
+
+class TransactionStatsResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+        Gets the count, sum, average, minimum and maximum of a user's
+        transactions per `interval` (day, week or month) and per category or
+        type, as parallel lists. Defaults to recent buckets up to now.
+        """
+        interval = request.args.get('interval', 'month')
+        group_by = request.args.get('group_by', 'category')
+        if interval not in STATS_INTERVALS:
+            return abort(400, message=f"Invalid interval. Use one of: {', '.join(STATS_INTERVALS)}.")
+        if group_by not in STATS_GROUPS:
+            return abort(400, message=f"Invalid group_by. Use one of: {', '.join(STATS_GROUPS)}.")
+
+        user_id = request.args.get('user_id', type=int) or g.user.id
+        if user_id != g.user.id and not g.user.is_admin:
+            return abort(403, message="Unauthorized.")
+
+        now = datetime.now()
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        try:
+            start = to_naive(datetime.fromisoformat(start_date)) if start_date else default_start(interval, now)
+        except ValueError:
+            return abort(400, message="Invalid start date format. Use ISO format (YYYY-MM-DD).")
+        try:
+            end = to_naive(datetime.fromisoformat(end_date)) if end_date else now
+            if end_date and len(end_date) == len('YYYY-MM-DD'):
+                # Include the whole end day, as a half-open range
+                end += timedelta(days=1)
+        except ValueError:
+            return abort(400, message="Invalid end date format. Use ISO format (YYYY-MM-DD).")
+
+        if start >= end:
+            return abort(400, message="start_date must be before end_date.")
+        if bucket_count(start, end, interval) > MAX_STATS_BUCKETS:
+            return abort(400, message=f"A request can cover at most {MAX_STATS_BUCKETS} {interval} buckets.")
+
+        rows, cache_hit = transaction_stats(
+            user_id, interval, group_by, start, end,
+            category_id=request.args.get('category_id', type=int),
+            category_type=request.args.get('type'),
+        )
+        stats = {'interval': interval, 'group_by': group_by, 'start': start, 'end': end, **columnar(rows, group_by)}
+        headers = {} if cache_hit is None else {'X-Cache': 'HIT' if cache_hit else 'MISS'}
+        return transaction_stats_schema.dump(stats), 200, headers
@@ -7,6 +7,7 @@ from budgetron.models import User, Role
 from budgetron.schemas import UserSchema
 from budgetron.utils.db import db
 from budgetron.utils.jwt import roles_required
+from budgetron.utils.lookups import get_by_id
 from budgetron.utils.paginate import paginate_query
 
 user_schema = UserSchema()
@@ -56,7 +57,7 @@ class UserListResource(Resource):
 class UserDetailResource(Resource):
     @roles_required('admin')
     def get(self, user_id):
-        user = User.query.filter_by(id=user_id).first()
+        user = get_by_id(User, user_id)
         if user is None:
             abort(404, message="User not found.")
 
@@ -65,7 +66,7 @@ class UserDetailResource(Resource):
     @roles_required('admin')
     def patch(self, user_id):
         try:
-            user = User.query.filter_by(id=user_id).first()
+            user = get_by_id(User, user_id)
             if user is None:
                 abort(404, message="User not found.")
 
@@ -108,7 +109,7 @@ class UserDetailResource(Resource):
 
     @roles_required('admin')
     def delete(self, user_id):
-        user = User.query.filter_by(id=user_id).first()
+        user = get_by_id(User, user_id)
         if user is None:
             abort(404, message="User not found.")
 
@@ -1,5 +1,5 @@
 from .user import UserSchema, LoginSchema, RegisterSchema
 from .category import CategorySchema
-from .budget import BudgetSchema
-from .transaction import TransactionSchema
-from .report import ReportSchema, ReportInputSchema
+from .budget import BudgetSchema, BudgetAlertSchema, BudgetBulkSchema, BudgetBulkItemSchema, BudgetDashboardSchema
+from .transaction import TransactionSchema, TransactionImportSchema, TransactionStatsSchema
+from .report import ReportSchema, ReportInputSchema, ReportSummarySchema
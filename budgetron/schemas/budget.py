@@ -1,8 +1,16 @@
-from marshmallow import Schema, fields, validate, validates, ValidationError
-from sqlalchemy import func
+from marshmallow import Schema, fields, validate, validates, validates_schema, ValidationError, pre_load
+from marshmallow.experimental.context import Context
 
-from budgetron.models import User, Category, Transaction
-from budgetron.utils.db import db
+from budgetron.models import User, Category
+from budgetron.services.budget_service import budget_dump_context, spent_key
+from budgetron.utils.lookups import get_by_id, prefetch_ids
+from budgetron.utils.money import Money, to_major
+
+
+MONTH_VALIDATOR = validate.Regexp(r'^\d{4}-\d{2}$', error="Invalid month date format. Use YYYY-MM.")
+
+# Most budgets accepted by a single bulk request
+MAX_BULK_BUDGETS = 500
 
 
 class BudgetSchema(Schema):
@@ -16,39 +24,117 @@ class BudgetSchema(Schema):
             error="Invalid month date format. Use YYYY-MM."
         ),
     )
-    amount = fields.Float(required=True)
+    amount = Money(required=True)
     spent = fields.Method("get_spent", dump_only=True)
     remaining = fields.Method("get_remaining", dump_only=True)
     overspent = fields.Method("get_overspent", dump_only=True)
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
 
-    def get_spent(self, obj):
+    @staticmethod
+    def spent_minor(obj):
         """
-        Return the total amount spent by a user in a category for a given month.
-        Assumes `month` is in 'YYYY-MM' format.
+        Return the total amount spent by a user in a category for the budget
+        month, in minor units.
+
+        Totals are read from the `spent` dict of the dump context, built for the
+        whole page by `budget_dump_context`; without one they are queried per budget.
         """
-        return (
-                db.session.query(func.sum(Transaction.amount)).join(Category).filter(
-                    Transaction.user_id == obj.user_id,
-                    Transaction.category_id == obj.category_id,
-                    func.to_char(Transaction.timestamp, 'YYYY-MM') == obj.month,
-                    Category.type == 'expense',
-                ).scalar() or 0.0
-        )
+        context = Context.get(None) or budget_dump_context([obj])
+        return context['spent'].get(spent_key(obj), 0)
+
+    def get_spent(self, obj):
+        return to_major(self.spent_minor(obj))
 
     def get_remaining(self, obj):
-        return obj.amount - self.get_spent(obj)
+        return to_major(obj.amount - self.spent_minor(obj))
 
     def get_overspent(self, obj):
-        return self.get_spent(obj) > obj.amount
+        return self.spent_minor(obj) > obj.amount
+
+    @pre_load(pass_collection=True)
+    def prefetch_references(self, data, many, **kwargs):
+        if many:
+            prefetch_ids(data, {'user_id': User, 'category_id': Category})
+        return data
 
     @validates('user_id')
     def validate_user_id_exists(self, user_id, data_key):
-        if User.query.filter_by(id=user_id).first() is None:
+        if get_by_id(User, user_id) is None:
             raise ValidationError("User does not exist.")
 
     @validates('category_id')
     def validate_category_id_exists(self, category_id, data_key):
-        if Category.query.filter_by(id=category_id).first() is None:
+        if get_by_id(Category, category_id) is None:
             raise ValidationError("Category does not exist.")
+
+
+class BudgetBulkItemSchema(Schema):
+    """A budget of a bulk request. Referenced ids are validated for the whole batch at once."""
+    user_id = fields.Integer()
+    category_id = fields.Integer(required=True)
+    month = fields.String(required=True, validate=MONTH_VALIDATOR)
+    amount = Money(required=True)
+
+
+class BudgetBulkSchema(Schema):
+    """Either a list of budgets, or a month to copy budgets from and to."""
+    user_id = fields.Integer()
+    budgets = fields.List(fields.Dict(), validate=validate.Length(min=1, max=MAX_BULK_BUDGETS))
+    from_month = fields.String(validate=MONTH_VALIDATOR)
+    to_month = fields.String(validate=MONTH_VALIDATOR)
+
+    @validates_schema
+    def validate_operation(self, data, **kwargs):
+        copy = 'from_month' in data or 'to_month' in data
+        if 'budgets' in data and copy:
+            raise ValidationError("Provide either budgets or from_month and to_month.", 'budgets')
+        if 'budgets' not in data and not copy:
+            raise ValidationError("Provide budgets, or from_month and to_month.", 'budgets')
+        if copy and ('from_month' not in data or 'to_month' not in data):
+            raise ValidationError("Both from_month and to_month are required to copy budgets.", 'to_month')
+        if copy and data.get('from_month') == data.get('to_month'):
+            raise ValidationError("to_month must differ from from_month.", 'to_month')
+
+
+class BudgetAlertSchema(Schema):
+    id = fields.Integer(dump_only=True)
+    user_id = fields.Integer(dump_only=True)
+    budget_id = fields.Integer(dump_only=True)
+    threshold = fields.Integer(dump_only=True)
+    spent = Money(dump_only=True)
+    amount = Money(dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
+
+
+class DashboardBudgetSchema(Schema):
+    id = fields.Integer()
+    category_id = fields.Integer()
+    category = fields.String()
+    amount = Money()
+    spent = Money()
+    remaining = Money()
+    percent_used = fields.Float(allow_none=True)
+    overspent = fields.Boolean()
+
+
+class DashboardCategorySchema(Schema):
+    category_id = fields.Integer()
+    category = fields.String()
+    count = fields.Integer()
+    total = Money()
+
+
+class DashboardTotalsSchema(Schema):
+    income = Money()
+    expense = Money()
+    net_balance = Money()
+    budgeted = Money()
+    budgeted_spent = Money()
+
+
+class BudgetDashboardSchema(Schema):
+    month = fields.String()
+    budgets = fields.List(fields.Nested(DashboardBudgetSchema))
+    unbudgeted = fields.List(fields.Nested(DashboardCategorySchema))
+    totals = fields.Nested(DashboardTotalsSchema)
@@ -1,22 +1,91 @@
-from marshmallow import Schema, fields, validates, ValidationError, validate
+from marshmallow import Schema, fields, validates, ValidationError, validate, validates_schema, post_load
 
 from budgetron.models import User
+from budgetron.services.exporters import EXPORTERS
+from budgetron.utils.lookups import get_by_id
+from budgetron.utils.money import Money
+from budgetron.utils.months import iter_months, parse_month
+
+# Longest period a single report may cover
+MAX_REPORT_MONTHS = 36
 
 
 class ReportSchema(Schema):
     id = fields.Integer(dump_only=True)
     user_id = fields.Integer(dump_only=True)
+    month = fields.String(dump_only=True)
+    end_month = fields.String(dump_only=True)
     format = fields.String()
+    mode = fields.String(dump_only=True)
+    status = fields.String(dump_only=True)
     file_url = fields.String()
+    row_count = fields.Integer(dump_only=True)
+    file_size = fields.Integer(dump_only=True)
+    data_version = fields.Integer(dump_only=True)
+    duration = fields.Float(dump_only=True)
+    error = fields.String(dump_only=True)
     created_at = fields.DateTime(dump_only=True)
+    completed_at = fields.DateTime(dump_only=True)
 
 
 class ReportInputSchema(Schema):
     user_id = fields.Integer(required=False)
-    month = fields.String(required=True, validate=validate.Regexp(r"\d{4}-\d{2}"))
-    format = fields.String(required=True, validate=validate.OneOf(["pdf", "csv", "xlsx"]))
+    month = fields.String(validate=validate.Regexp(r"\d{4}-\d{2}"))
+    start_month = fields.String(validate=validate.Regexp(r"\d{4}-\d{2}"))
+    end_month = fields.String(validate=validate.Regexp(r"\d{4}-\d{2}"))
+    format = fields.String(required=True, validate=validate.OneOf(list(EXPORTERS)))
+    mode = fields.String(load_default='detailed', validate=validate.OneOf(["detailed", "summary"]))
 
     @validates("user_id")
     def validate_user_id_exists(self, user_id, data_key):
-        if user_id and not User.query.filter_by(id=user_id).first():
+        if user_id and get_by_id(User, user_id) is None:
             raise ValidationError("User not found.")
+
+    @validates_schema
+    def validate_period(self, data, **kwargs):
+        """Require either a single `month` or a `start_month`..`end_month` range."""
+        if 'month' in data:
+            if 'start_month' in data or 'end_month' in data:
+                raise ValidationError("Use either month or start_month and end_month.", 'month')
+            start_month = end_month = data['month']
+        elif 'start_month' in data and 'end_month' in data:
+            start_month, end_month = data['start_month'], data['end_month']
+        else:
+            raise ValidationError("Provide a month, or a start_month and end_month.", 'month')
+
+        try:
+            start, end = parse_month(start_month), parse_month(end_month)
+        except ValueError:
+            raise ValidationError("Invalid month date format. Use YYYY-MM.", 'month')
+
+        if start > end:
+            raise ValidationError("start_month must not be after end_month.", 'end_month')
+
+        if len(list(iter_months(start_month, end_month))) > MAX_REPORT_MONTHS:
+            raise ValidationError(f"A report can cover at most {MAX_REPORT_MONTHS} months.", 'end_month')
+
+    @post_load
+    def normalise_period(self, data, **kwargs):
+        """Express single-month reports as a one-month range."""
+        if 'month' in data:
+            data['start_month'] = data['end_month'] = data.pop('month')
+        return data
+
+
+class SummaryGroupSchema(Schema):
+    category = fields.String()
+    month = fields.String()
+    date = fields.Date()
+    type = fields.String()
+    count = fields.Integer()
+    total = Money()
+
+
+class ReportSummarySchema(Schema):
+    start_month = fields.String()
+    end_month = fields.String()
+    categories = fields.List(fields.Nested(SummaryGroupSchema(only=('category', 'type', 'count', 'total'))))
+    types = fields.List(fields.Nested(SummaryGroupSchema(only=('type', 'count', 'total'))))
+    months = fields.List(fields.Nested(SummaryGroupSchema(only=('month', 'type', 'count', 'total'))))
+    days = fields.List(fields.Nested(SummaryGroupSchema(only=('date', 'type', 'count', 'total'))))
+    net_balance = Money()
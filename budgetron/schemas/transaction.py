@@ -1,22 +1,57 @@
-from marshmallow import Schema, fields, validates, ValidationError, validate
+from marshmallow import Schema, fields, validates, ValidationError, validate, pre_load
 
 from budgetron.models import User, Category
+from budgetron.utils.lookups import get_by_id, prefetch_ids
+from budgetron.utils.money import MINOR_UNITS, Money
+
+# Smallest accepted transaction amount, one major unit
+MIN_AMOUNT = validate.Range(min=MINOR_UNITS, error="Must be at least 1.")
 
 
 class TransactionSchema(Schema):
     id = fields.Integer(dump_only=True)
     user_id = fields.Integer(required=True)
     category_id = fields.Integer(required=True)
-    amount = fields.Float(required=True, validate=validate.Range(min=1))
+    amount = Money(required=True, validate=MIN_AMOUNT)
     description = fields.String(required=True, validate=validate.Length(min=5, max=255))
     timestamp = fields.DateTime(dump_only=True)
 
+    @pre_load(pass_collection=True)
+    def prefetch_references(self, data, many, **kwargs):
+        if many:
+            prefetch_ids(data, {'user_id': User, 'category_id': Category})
+        return data
+
     @validates('user_id')
     def validate_user_id_exists(self, user_id, data_key):
-        if User.query.filter_by(id=user_id).first() is None:
+        if get_by_id(User, user_id) is None:
             raise ValidationError("User does not exist.")
 
     @validates('category_id')
     def validate_category_id_exists(self, category_id, data_key):
-        if Category.query.filter_by(id=category_id).first() is None:
+        if get_by_id(Category, category_id) is None:
             raise ValidationError("Category does not exist.")
+
+
+class TransactionImportSchema(Schema):
+    """A row of a transaction import. Category ids are checked against a preloaded set."""
+    category_id = fields.Integer(required=True)
+    amount = Money(required=True, validate=MIN_AMOUNT)
+    description = fields.String(required=True, validate=validate.Length(min=5, max=255))
+    timestamp = fields.DateTime(load_default=None)
+
+
+class TransactionStatsSchema(Schema):
+    """Columnar time-series statistics: the n-th value of every list belongs to the n-th row."""
+    interval = fields.String()
+    group_by = fields.String()
+    start = fields.DateTime()
+    end = fields.DateTime()
+    bucket = fields.List(fields.DateTime())
+    category_id = fields.List(fields.Integer())
+    group = fields.List(fields.String(allow_none=True))
+    count = fields.List(fields.Integer())
+    sum = fields.List(Money())
+    avg = fields.List(Money())
+    min = fields.List(Money())
+    max = fields.List(Money())
@@ -1,6 +1,7 @@
 from marshmallow import Schema, fields, validates, ValidationError, validate, validates_schema
 
 from budgetron.models import User, Role
+from budgetron.utils.lookups import get_all
 
 
 class BaseUserSchema(Schema):
@@ -49,7 +50,7 @@ class UserSchema(BaseUserSchema):
 
     @validates('roles')
     def validate_roles(self, roles_list, data_key):
-        existing_roles = {r.name for r in Role.query.all()}
+        existing_roles = {r.name for r in get_all(Role)}
         for role in roles_list:
             if role not in existing_roles:
                 raise ValidationError(f"Role '{role}' does not exist.")
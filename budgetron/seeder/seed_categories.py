@@ -1,5 +1,6 @@
 from budgetron.models import Category
 from budgetron.utils.db import db
+from budgetron.utils.versioning import bump_versions, list_key
 
 def seed_categories():
     DEFAULT_CATEGORIES = [
@@ -29,6 +30,7 @@ def seed_categories():
         {"name": "Other Income", "type": "income"},
     ]
 
+    seeded = False
     for cat in DEFAULT_CATEGORIES:
         category_name = cat['name']
         category_type = cat['type']
@@ -37,6 +39,9 @@ def seed_categories():
         if not existing:
             category = Category(name=cat['name'], type=category_type, is_default=True, user_id=None)
             db.session.add(category)
+            seeded = True
             print(f"Seeded category: {category_name} ({category_type})")
 
+    if seeded:
+        bump_versions(list_key('categories', 'default'))
     db.session.commit()
\ No newline at end of file
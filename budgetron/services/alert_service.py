@@ -0,0 +1,42 @@
+"""Module for recording budget threshold alerts."""
+from flask import current_app
+from sqlalchemy import tuple_
+
+from budgetron.models import Budget, BudgetAlert, Category
+from budgetron.utils.db import db
+
+
+def evaluate_budget_alerts(deltas, totals):
+    """
+    Record an alert for every budget threshold crossed by a rollup change.
+
+    `deltas` are the `{(user_id, category_id, month): (count, total)}` changes
+    just applied and `totals` the resulting running totals, so only the
+    matching budgets are read and no transactions are rescanned. Returns the
+    new, not yet flushed, alerts.
+    """
+    increased = {key: totals[key] for key, (_, total) in deltas.items() if total > 0 and key in totals}
+    if not increased:
+        return []
+
+    budgets = db.session.query(
+        Budget.id, Budget.user_id, Budget.category_id, Budget.month, Budget.amount
+    ).join(Category, Budget.category_id == Category.id).filter(
+        tuple_(Budget.user_id, Budget.category_id, Budget.month).in_(sorted(increased)),
+        Category.type == 'expense',
+    ).all()
+
+    thresholds = sorted(current_app.config['BUDGET_ALERT_THRESHOLDS'])
+    alerts = []
+    for budget_id, user_id, category_id, month, amount in budgets:
+        key = (user_id, category_id, month)
+        spent = increased[key]
+        previous = spent - deltas[key][1]
+        alerts.extend(
+            BudgetAlert(user_id=user_id, budget_id=budget_id, threshold=threshold, spent=spent, amount=amount)
+            for threshold in thresholds
+            if previous * 100 < amount * threshold <= spent * 100
+        )
+
+    db.session.add_all(alerts)
+    return alerts
@@ -0,0 +1,123 @@
+"""Module for benchmarking aggregation of float and integer amounts."""
+import statistics
+import time
+from collections import namedtuple
+
+import numpy as np
+from sqlalchemy import text
+
+from budgetron.utils.db import db
+from budgetron.utils.money import MINOR_UNITS
+
+# A measurement for amounts stored as double precision and as BIGINT minor units
+AmountBenchmarkResult = namedtuple('AmountBenchmarkResult', ['name', 'float_value', 'integer_value', 'unit'])
+
+TABLES = {'float': 'bench_amounts_float', 'integer': 'bench_amounts_integer'}
+
+
+def seed_amount_tables(rows, users):
+    """
+    Create two temporary tables holding the same `rows` amounts spread over
+    `users`, one as double precision major units and one as BIGINT minor
+    units, each with a `(user_id, amount)` index.
+    """
+    db.session.execute(text(
+        f"CREATE TEMPORARY TABLE {TABLES['integer']} (user_id integer NOT NULL, amount bigint NOT NULL)"
+    ))
+    db.session.execute(text(
+        f"CREATE TEMPORARY TABLE {TABLES['float']} (user_id integer NOT NULL, amount double precision NOT NULL)"
+    ))
+    db.session.execute(text(
+        f"""
+        INSERT INTO {TABLES['integer']} (user_id, amount)
+        SELECT g % :users, (random() * 50000)::bigint FROM generate_series(1, :rows) AS g
+        """
+    ), {'rows': rows, 'users': users})
+    db.session.execute(text(
+        f"INSERT INTO {TABLES['float']} (user_id, amount) "
+        f"SELECT user_id, amount::double precision / {MINOR_UNITS} FROM {TABLES['integer']}"
+    ))
+    for table in TABLES.values():
+        db.session.execute(text(f"CREATE INDEX {table}_ix ON {table} (user_id, amount)"))
+        db.session.execute(text(f"ANALYZE {table}"))
+
+
+def time_call(call, repeat):
+    """Return the median time in milliseconds of `repeat` calls, after a warm-up call."""
+    call()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def relation_size(name):
+    """Return the size of a table or index in MiB."""
+    return db.session.execute(text("SELECT pg_relation_size(:name)"), {'name': name}).scalar() / 2 ** 20
+
+
+def load_arrays(table, dtype):
+    """Return `(user_ids, amounts)` NumPy arrays of a benchmark table, sorted by user."""
+    rows = db.session.execute(text(f"SELECT user_id, amount FROM {table} ORDER BY user_id")).all()
+    user_ids = np.fromiter((user_id for user_id, _ in rows), dtype=np.int32, count=len(rows))
+    amounts = np.fromiter((amount for _, amount in rows), dtype=dtype, count=len(rows))
+    return user_ids, amounts
+
+
+def group_sums(user_ids, amounts):
+    """Sum the amounts of each user, given arrays sorted by user id."""
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+    return np.add.reduceat(amounts, starts)
+
+
+def run_amount_benchmark(rows, users, repeat):
+    """
+    Compare double precision and BIGINT amounts: SQL `SUM` latency, per-user
+    sums over NumPy float64 and int64 arrays, table and index size, and the
+    error float sums accumulate. Everything is rolled back.
+    """
+    results = []
+    try:
+        seed_amount_tables(rows, users)
+
+        for name, sql in (
+            ('SQL sum, all rows', "SELECT sum(amount) FROM {table}"),
+            ('SQL sum per user', "SELECT user_id, sum(amount) FROM {table} GROUP BY user_id"),
+        ):
+            float_time, integer_time = (
+                time_call(lambda table=table: db.session.execute(text(sql.format(table=table))).all(), repeat)
+                for table in (TABLES['float'], TABLES['integer'])
+            )
+            results.append(AmountBenchmarkResult(name, float_time, integer_time, 'ms'))
+
+        float_users, float_amounts = load_arrays(TABLES['float'], np.float64)
+        integer_users, integer_amounts = load_arrays(TABLES['integer'], np.int64)
+        results.append(AmountBenchmarkResult(
+            'NumPy sum, all rows',
+            time_call(lambda: float_amounts.sum(), repeat),
+            time_call(lambda: integer_amounts.sum(), repeat),
+            'ms',
+        ))
+        results.append(AmountBenchmarkResult(
+            'NumPy sum per user',
+            time_call(lambda: group_sums(float_users, float_amounts), repeat),
+            time_call(lambda: group_sums(integer_users, integer_amounts), repeat),
+            'ms',
+        ))
+
+        for label, suffix in (('table size', ''), ('index size', '_ix')):
+            results.append(AmountBenchmarkResult(
+                label, relation_size(TABLES['float'] + suffix), relation_size(TABLES['integer'] + suffix), 'MiB'
+            ))
+
+        # Integer sums are exact, so their difference from float sums is the float error
+        float_error = np.abs(
+            group_sums(float_users, float_amounts) * MINOR_UNITS - group_sums(integer_users, integer_amounts)
+        ).max()
+        results.append(AmountBenchmarkResult('max per-user sum error', float(float_error), 0.0, 'minor'))
+    finally:
+        db.session.rollback()
+
+    return results
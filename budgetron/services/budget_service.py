@@ -0,0 +1,166 @@
+"""Module for computing budget spending and writing budgets in bulk."""
+from sqlalchemy import String, func, literal, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from budgetron.models import Budget, Category, MonthlyCategoryTotal
+from budgetron.utils.db import db
+from budgetron.utils.money import percent
+from budgetron.utils.versioning import bump_versions, list_key
+
+# Postgres leaves xmax at 0 for rows inserted, rather than updated, by an upsert
+INSERTED = literal_column('(xmax = 0)').label('inserted')
+
+
+def spent_key(budget):
+    """Key of a budget in the dict returned by `spent_totals`."""
+    return budget.user_id, budget.category_id, budget.month
+
+
+def spent_totals(budgets):
+    """
+    Return the expense totals of the given budgets, looked up in the monthly
+    rollups with one query, as a `{(user_id, category_id, month): spent}`
+    dict. Budgets without transactions are left out.
+    """
+    keys = {spent_key(budget) for budget in budgets}
+    if not keys:
+        return {}
+
+    rows = db.session.query(
+        MonthlyCategoryTotal.user_id,
+        MonthlyCategoryTotal.category_id,
+        MonthlyCategoryTotal.month,
+        MonthlyCategoryTotal.total,
+    ).join(Category, MonthlyCategoryTotal.category_id == Category.id).filter(
+        tuple_(MonthlyCategoryTotal.user_id, MonthlyCategoryTotal.category_id, MonthlyCategoryTotal.month).in_(
+            sorted(keys)
+        ),
+        Category.type == 'expense',
+    ).all()
+
+    return {(user_id, category_id, month): total for user_id, category_id, month, total in rows}
+
+
+def budget_dump_context(budgets):
+    """Build the `BudgetSchema` dump context for a page of budgets."""
+    return {'spent': spent_totals(budgets)}
+
+
+def upsert_budget_statement(source):
+    """
+    Wrap an INSERT of budgets into an upsert on the `unique_budget` constraint
+    returning `(id, user_id, category_id, month, inserted)` rows.
+    """
+    return source.on_conflict_do_update(
+        constraint='unique_budget',
+        set_={'amount': source.excluded.amount, 'updated_at': func.now()},
+    ).returning(Budget.id, Budget.user_id, Budget.category_id, Budget.month, INSERTED)
+
+
+def upsert_budgets(rows):
+    """
+    Create or update `{user_id, category_id, month, amount}` budgets in one
+    statement. Returns `{(user_id, category_id, month): (id, inserted)}`.
+    Keys must be unique within `rows`.
+    """
+    if not rows:
+        return {}
+
+    stmt = upsert_budget_statement(insert(Budget).values(rows))
+    bump_versions(*(list_key('budgets', row['user_id']) for row in rows))
+    return {
+        (user_id, category_id, month): (budget_id, inserted)
+        for budget_id, user_id, category_id, month, inserted in db.session.execute(stmt)
+    }
+
+
+def copy_budgets(user_id, from_month, to_month):
+    """
+    Copy a user's budgets of one month to another in one statement, overwriting
+    the amounts of budgets that already exist in the target month. Returns
+    `(id, category_id, inserted)` rows.
+    """
+    source = select(Budget.user_id, Budget.category_id, literal(to_month, String), Budget.amount).where(
+        Budget.user_id == user_id,
+        Budget.month == from_month,
+    ).order_by(Budget.category_id)
+    stmt = upsert_budget_statement(
+        insert(Budget).from_select(['user_id', 'category_id', 'month', 'amount'], source)
+    )
+    bump_versions(list_key('budgets', user_id))
+    return [
+        (budget_id, category_id, inserted)
+        for budget_id, _, category_id, _, inserted in db.session.execute(stmt)
+    ]
+
+
+def budget_dashboard(user_id, month):
+    """
+    Return a user's budgets for a month with their spending, the spending of
+    categories without a budget, and income and expense totals.
+
+    Spending is read from the monthly rollups: one query joins the budgets to
+    their totals and one returns every category total of the month. Amounts
+    are integer minor units, converted by `BudgetDashboardSchema`.
+    """
+    budgets = db.session.query(
+        Budget.id,
+        Budget.category_id,
+        Category.name,
+        Budget.amount,
+        func.coalesce(MonthlyCategoryTotal.total, 0),
+    ).join(Category, Budget.category_id == Category.id).outerjoin(
+        MonthlyCategoryTotal,
+        (MonthlyCategoryTotal.user_id == Budget.user_id)
+        & (MonthlyCategoryTotal.category_id == Budget.category_id)
+        & (MonthlyCategoryTotal.month == Budget.month)
+        # Only expenses count as spent, as in `spent_totals`
+        & (Category.type == 'expense'),
+    ).filter(
+        Budget.user_id == user_id,
+        Budget.month == month,
+    ).order_by(Category.name).all()
+
+    totals = db.session.query(
+        MonthlyCategoryTotal.category_id,
+        Category.name,
+        Category.type,
+        MonthlyCategoryTotal.count,
+        MonthlyCategoryTotal.total,
+    ).join(Category, MonthlyCategoryTotal.category_id == Category.id).filter(
+        MonthlyCategoryTotal.user_id == user_id,
+        MonthlyCategoryTotal.month == month,
+    ).order_by(MonthlyCategoryTotal.total.desc()).all()
+
+    budgeted = {category_id for _, category_id, _, _, _ in budgets}
+    income = sum(total for _, _, category_type, _, total in totals if category_type == 'income')
+    expense = sum(total for _, _, category_type, _, total in totals if category_type == 'expense')
+
+    return {
+        'month': month,
+        'budgets': [
+            {
+                'id': budget_id,
+                'category_id': category_id,
+                'category': name,
+                'amount': amount,
+                'spent': spent,
+                'remaining': amount - spent,
+                'percent_used': percent(spent, amount),
+                'overspent': spent > amount,
+            }
+            for budget_id, category_id, name, amount, spent in budgets
+        ],
+        'unbudgeted': [
+            {'category_id': category_id, 'category': name, 'count': count, 'total': total}
+            for category_id, name, category_type, count, total in totals
+            if category_type == 'expense' and category_id not in budgeted
+        ],
+        'totals': {
+            'income': income,
+            'expense': expense,
+            'net_balance': income - expense,
+            'budgeted': sum(amount for _, _, _, amount, _ in budgets),
+            'budgeted_spent': sum(spent for _, _, _, _, spent in budgets),
+        },
+    }
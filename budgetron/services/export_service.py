@@ -0,0 +1,81 @@
+"""Module for streaming transaction history exports."""
+import csv
+import io
+import json
+
+from budgetron.models import Transaction
+from budgetron.utils.money import to_major
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Rows fetched from the server-side cursor at a time
+EXPORT_BATCH_SIZE = 1000
+
+# Bytes of output buffered before a chunk is sent to the client
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_COLUMNS = ('id', 'user_id', 'category_id', 'amount', 'description', 'timestamp')
+
+
+def export_rows(query):
+    """
+    Yield `EXPORT_COLUMNS` dicts for the transactions of `query`, newest
+    first, with amounts in major units and ISO timestamps.
+
+    Rows are read from a server-side cursor in batches of `EXPORT_BATCH_SIZE`,
+    so only one batch is held in memory at a time.
+    """
+    query = query.with_entities(*(getattr(Transaction, column) for column in EXPORT_COLUMNS)).order_by(
+        Transaction.timestamp.desc(), Transaction.id.desc()
+    )
+
+    for row in query.yield_per(EXPORT_BATCH_SIZE):
+        record = dict(zip(EXPORT_COLUMNS, row))
+        record['amount'] = to_major(record['amount'])
+        record['timestamp'] = record['timestamp'].isoformat() if record['timestamp'] else None
+        yield record
+
+
+def ndjson_lines(records):
+    """Yield one JSON object per record."""
+    for record in records:
+        yield json.dumps(record, separators=(',', ':')) + '\n'
+
+
+def csv_lines(records):
+    """Yield a header line, then one CSV line per record."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    yield line(EXPORT_COLUMNS)
+    for record in records:
+        yield line(record.values())
+
+
+def stream_transactions(query, export_format):
+    """
+    Yield an export of the transactions of `query` as encoded chunks of about
+    `EXPORT_CHUNK_SIZE` bytes, ready for a streaming response.
+    """
+    lines = ndjson_lines if export_format == 'ndjson' else csv_lines
+    chunk, size = [], 0
+    for text in lines(export_rows(query)):
+        chunk.append(text)
+        size += len(text)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk).encode('utf-8')
+            chunk, size = [], 0
+
+    if chunk:
+        yield ''.join(chunk).encode('utf-8')
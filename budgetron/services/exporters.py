@@ -0,0 +1,266 @@
+"""Module for streaming report exporters."""
+import csv
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import date, datetime
+
+# A report column: its header, width in characters and kind of value
+# ('text', 'timestamp', 'integer' or 'amount')
+Column = namedtuple('Column', ['header', 'width', 'kind'], defaults=['text'])
+
+# Outcome of writing a report file, used to compare format costs
+ExportResult = namedtuple('ExportResult', ['row_count', 'bytes_written', 'elapsed'])
+
+DATE_FORMAT = '%d-%m-%Y'
+
+
+def format_cell(value):
+    """Format a cell value as display text."""
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+class ReportExporter(ABC):
+    """
+    Base class for report exporters.
+
+    Exporters consume an iterator of rows, one value per column, and write
+    them to disk as they arrive, so no format needs the full report in memory.
+    """
+    extension = None
+    content_type = 'application/octet-stream'
+    # Whether the output is worth gzip-compressing in storage
+    compressible = False
+
+    def export(self, filepath, columns, rows):
+        """Write `rows` to `filepath` and return an `ExportResult`."""
+        started = time.perf_counter()
+        row_count = self.write(filepath, columns, rows)
+        elapsed = round(time.perf_counter() - started, 3)
+        return ExportResult(row_count, os.path.getsize(filepath), elapsed)
+
+    @abstractmethod
+    def write(self, filepath, columns, rows):
+        """Write the report file and return the number of data rows written."""
+
+
+class CsvExporter(ReportExporter):
+    extension = 'csv'
+    content_type = 'text/csv'
+    compressible = True
+
+    def write(self, filepath, columns, rows):
+        row_count = 0
+        with open(filepath, 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow([column.header for column in columns])
+            for row in rows:
+                writer.writerow([
+                    value.strftime(DATE_FORMAT) if isinstance(value, (date, datetime)) else value
+                    for value in row
+                ])
+                row_count += 1
+
+        return row_count
+
+
+class XlsxExporter(ReportExporter):
+    """Writes spreadsheets in XlsxWriter's constant memory mode, one row at a time."""
+    extension = 'xlsx'
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    def write(self, filepath, columns, rows):
+        import xlsxwriter
+
+        workbook = xlsxwriter.Workbook(filepath, {'constant_memory': True})
+        try:
+            worksheet = workbook.add_worksheet('Report')
+            header_format = workbook.add_format({'bold': True})
+            date_format = workbook.add_format({'num_format': 'dd-mm-yyyy'})
+            amount_format = workbook.add_format({'num_format': '#,##0.00'})
+
+            for index, column in enumerate(columns):
+                worksheet.set_column(index, index, column.width)
+            worksheet.write_row(0, 0, [column.header for column in columns], header_format)
+
+            row_count = 0
+            for row in rows:
+                row_count += 1
+                for index, value in enumerate(row):
+                    if value is None:
+                        continue
+                    if isinstance(value, (date, datetime)):
+                        worksheet.write_datetime(row_count, index, value, date_format)
+                    elif isinstance(value, float):
+                        worksheet.write_number(row_count, index, value, amount_format)
+                    elif isinstance(value, int):
+                        worksheet.write_number(row_count, index, value)
+                    else:
+                        worksheet.write_string(row_count, index, str(value))
+        finally:
+            workbook.close()
+
+        return row_count
+
+
+class PdfExporter(ReportExporter):
+    """Draws a paginated table, emitting each page as soon as it is full."""
+    extension = 'pdf'
+    content_type = 'application/pdf'
+
+    MARGIN = 36
+    ROW_HEIGHT = 14
+    FONT_SIZE = 9
+
+    def write(self, filepath, columns, rows):
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from reportlab.pdfgen import canvas
+
+        page_width, page_height = landscape(A4)
+        pdf = canvas.Canvas(filepath, pagesize=(page_width, page_height), pageCompression=1)
+
+        # Share the printable width between columns in proportion to their widths
+        scale = (page_width - 2 * self.MARGIN) / sum(column.width for column in columns)
+        widths = [column.width * scale for column in columns]
+
+        def fit(text, width, font):
+            """Truncate text so it fits inside a column."""
+            while text and stringWidth(text, font, self.FONT_SIZE) > width - 4:
+                text = text[:-2] + '…' if len(text) > 1 else ''
+            return text
+
+        def draw_row(y, values, font='Helvetica'):
+            pdf.setFont(font, self.FONT_SIZE)
+            x = self.MARGIN
+            for value, width in zip(values, widths):
+                text = fit(format_cell(value), width, font)
+                if isinstance(value, (int, float)):
+                    pdf.drawRightString(x + width - 2, y, text)
+                else:
+                    pdf.drawString(x + 2, y, text)
+                x += width
+
+        def start_page(page_number):
+            pdf.setFont('Helvetica', self.FONT_SIZE)
+            pdf.drawRightString(page_width - self.MARGIN, self.MARGIN / 2, f"Page {page_number}")
+            y = page_height - self.MARGIN
+            draw_row(y, [column.header for column in columns], font='Helvetica-Bold')
+            return y - self.ROW_HEIGHT
+
+        page_number = 1
+        y = start_page(page_number)
+        row_count = 0
+        for row in rows:
+            if y < self.MARGIN:
+                pdf.showPage()
+                page_number += 1
+                y = start_page(page_number)
+
+            draw_row(y, row)
+            y -= self.ROW_HEIGHT
+            row_count += 1
+
+        pdf.save()
+        return row_count
+
+
+class ParquetExporter(ReportExporter):
+    """
+    Writes a typed, compressed Parquet file one row group at a time.
+
+    Parquet keeps min/max statistics for every column of every row group,
+    and the file footer carries a JSON summary of the whole report, so
+    readers can skip row groups without decoding them.
+    """
+    extension = 'parquet'
+    content_type = 'application/vnd.apache.parquet'
+
+    ROW_GROUP_SIZE = 10000
+    COMPRESSION = 'zstd'
+
+    def write(self, filepath, columns, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {
+            'text': pa.string(),
+            'timestamp': pa.timestamp('us'),
+            'integer': pa.int64(),
+            'amount': pa.float64(),
+        }
+        schema = pa.schema([
+            pa.field(column.header.lower().replace(' ', '_'), arrow_types[column.kind]) for column in columns
+        ])
+
+        row_count = 0
+        totals = {field.name: 0.0 for column, field in zip(columns, schema) if column.kind == 'amount'}
+        bounds = {field.name: [] for column, field in zip(columns, schema) if column.kind == 'timestamp'}
+
+        def to_arrow(value, kind):
+            if kind == 'text' and isinstance(value, (date, datetime)):
+                return value.isoformat()
+            if kind == 'text' and value is not None:
+                return str(value)
+            return value
+
+        def flush(batch):
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(batch, schema)],
+                schema=schema,
+            ))
+            for values, field in zip(batch, schema):
+                present = [value for value in values if value is not None]
+                if field.name in totals:
+                    totals[field.name] += sum(present)
+                elif field.name in bounds and present:
+                    bounds[field.name] = [min(present + bounds[field.name]), max(present + bounds[field.name])]
+
+        with pq.ParquetWriter(filepath, schema, compression=self.COMPRESSION, write_statistics=True) as writer:
+            batch = [[] for _ in columns]
+            for row in rows:
+                for values, value, column in zip(batch, row, columns):
+                    values.append(to_arrow(value, column.kind))
+                row_count += 1
+
+                if len(batch[0]) >= self.ROW_GROUP_SIZE:
+                    flush(batch)
+                    batch = [[] for _ in columns]
+
+            if batch[0] or not row_count:
+                flush(batch)
+
+            summary = {'rows': row_count}
+            for name, total in totals.items():
+                summary[f"{name}_sum"] = round(total, 2)
+            for name, values in bounds.items():
+                summary[f"{name}_min"], summary[f"{name}_max"] = (
+                    [value.isoformat() for value in values] if values else [None, None]
+                )
+            writer.add_key_value_metadata({'budgetron.summary': json.dumps(summary)})
+
+        return row_count
+
+
+EXPORTERS = {
+    'csv': CsvExporter(),
+    'parquet': ParquetExporter(),
+    'pdf': PdfExporter(),
+    'xlsx': XlsxExporter(),
+}
+
+
+def get_exporter(report_format):
+    """Return the exporter registered for a report format."""
+    exporter = EXPORTERS.get(report_format)
+    if exporter is None:
+        raise ValueError(f"Unsupported report format '{report_format}'.")
+    return exporter
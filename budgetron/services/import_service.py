@@ -0,0 +1,142 @@
+"""Module for importing transactions in bulk from uploaded files."""
+import codecs
+import csv
+import io
+import json
+import time
+from collections import namedtuple
+
+from marshmallow import ValidationError
+from sqlalchemy import func, insert, select
+
+from budgetron.models import Category, Transaction
+from budgetron.schemas import TransactionImportSchema
+from budgetron.services.transaction_service import TransactionSnapshot, add_delta, apply_transaction_deltas
+from budgetron.utils.db import db
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_BATCH_SIZE = 5000
+# Rows beyond this many errors are still validated, but not listed
+MAX_IMPORT_ERRORS = 1000
+
+IMPORT_COLUMNS = ('user_id', 'category_id', 'amount', 'description', 'timestamp')
+COPY_SQL = f"COPY transactions ({', '.join(IMPORT_COLUMNS)}) FROM STDIN"
+
+ImportResult = namedtuple('ImportResult', ['imported', 'failed', 'errors', 'elapsed'])
+
+import_row_schema = TransactionImportSchema()
+
+
+class ImportFormatError(Exception):
+    """Raised when an upload cannot be parsed at all."""
+
+
+def read_rows(stream, file_format):
+    """
+    Yield `(row_number, data)` pairs from a binary upload stream, decoding it
+    incrementally. Undecodable NDJSON lines are yielded as `(row_number, None)`.
+    """
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        if reader.fieldnames is None:
+            return
+        missing = {'category_id', 'amount', 'description'} - set(reader.fieldnames)
+        if missing:
+            raise ImportFormatError(f"Missing CSV column(s): {', '.join(sorted(missing))}.")
+        for data in reader:
+            # Empty cells count as missing values
+            yield reader.line_num, {key: value for key, value in data.items() if key and value not in ('', None)}
+    else:
+        for row_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                data = None
+            yield row_number, data if isinstance(data, dict) else None
+
+
+def copy_transactions(rows):
+    """
+    Load `(user_id, category_id, amount, description, timestamp)` rows with
+    COPY on psycopg 3 (`postgresql+psycopg://` URLs) and psycopg2
+    (`postgresql://`), or a multi-row INSERT on any other driver.
+    """
+    connection = db.session.connection()
+    driver = connection.dialect.driver
+    if driver == 'psycopg':
+        cursor = connection.connection.driver_connection.cursor()
+        with cursor.copy(COPY_SQL) as copy:
+            for row in rows:
+                copy.write_row(row)
+    elif driver == 'psycopg2':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for user_id, category_id, amount, description, timestamp in rows:
+            writer.writerow((user_id, category_id, amount, description, timestamp.isoformat()))
+        buffer.seek(0)
+        with connection.connection.driver_connection.cursor() as cursor:
+            cursor.copy_expert(f"{COPY_SQL} WITH (FORMAT csv)", buffer)
+    else:
+        connection.execute(insert(Transaction.__table__), [dict(zip(IMPORT_COLUMNS, row)) for row in rows])
+
+
+def import_transactions(user_id, stream, file_format):
+    """
+    Validate and insert the transactions of an uploaded CSV or NDJSON file.
+
+    Rows are parsed as they are read and loaded with COPY in batches of
+    `IMPORT_BATCH_SIZE`; invalid rows are skipped and reported. Derived data
+    is updated once for the whole import, and everything is committed together.
+    """
+    started = time.perf_counter()
+    category_ids = {
+        category_id for (category_id,) in db.session.query(Category.id).filter(
+            (Category.is_default == True) | (Category.user_id == user_id)
+        )
+    }
+
+    # The database clock, as when the timestamp server default applies
+    now = db.session.scalar(select(func.localtimestamp()))
+    batch, deltas, errors = [], {}, []
+    imported = failed = 0
+    try:
+        for row_number, data in read_rows(stream, file_format):
+            try:
+                if data is None:
+                    raise ValidationError({'_schema': ["Invalid JSON object."]})
+                values = import_row_schema.load(data, unknown='exclude')
+                if values['category_id'] not in category_ids:
+                    raise ValidationError({'category_id': ["Category does not exist."]})
+            except ValidationError as err:
+                failed += 1
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append({'row': row_number, 'errors': err.messages})
+                continue
+
+            timestamp = values['timestamp'] or now
+            batch.append((user_id, values['category_id'], values['amount'], values['description'], timestamp))
+            add_delta(deltas, TransactionSnapshot(
+                user_id, values['category_id'], timestamp.strftime('%Y-%m'), values['amount']
+            ), 1)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                copy_transactions(batch)
+                imported += len(batch)
+                batch = []
+
+        if batch:
+            copy_transactions(batch)
+            imported += len(batch)
+
+        apply_transaction_deltas(deltas)
+        db.session.commit()
+    except (csv.Error, UnicodeDecodeError) as err:
+        db.session.rollback()
+        raise ImportFormatError(f"Could not parse the upload: {err}") from err
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return ImportResult(imported, failed, errors, time.perf_counter() - started)
@@ -0,0 +1,247 @@
+"""Module for benchmarking list and search queries with and without their indexes."""
+import statistics
+import time
+from collections import namedtuple
+
+from sqlalchemy import text
+
+from budgetron.models import Budget, Category, Report, Role, Transaction, user_roles
+from budgetron.services.search_service import search_transactions
+from budgetron.utils.db import db
+
+# Indexes serving the list endpoints, dropped for the "without" measurements
+LIST_INDEXES = [
+    'ix_transactions_user_timestamp',
+    'ix_transactions_user_category_timestamp',
+    'ix_transactions_category_timestamp',
+    'ix_transactions_timestamp',
+    'ix_reports_user_created_at',
+    'ix_reports_created_at',
+    'ix_budgets_user_month',
+    'ix_budgets_month',
+    'ix_budgets_category_id',
+    'ix_categories_user_id_name',
+    'ix_categories_default_name',
+    'ix_user_roles_user_id_role_id',
+    'ix_user_roles_role_id',
+]
+
+# Indexes serving transaction searches
+SEARCH_INDEXES = ['ix_transactions_search_vector', 'ix_transactions_description_trgm']
+
+# (name, search term, search mode) timed by the search benchmark. 'grocer' matches
+# one row in twenty, '98765' a handful of rows.
+SEARCH_CASES = [
+    ('ilike (previous behaviour)', 'grocer', None),
+    ('prefix', 'grocer', 'prefix'),
+    ('prefix, two words', 'fresh grocer', 'prefix'),
+    ('fulltext', 'fresh grocery -nairobi', 'fulltext'),
+    ('substring', 'ocery', 'substring'),
+    ('ilike, selective', '98765', None),
+    ('prefix, selective', '98765', 'prefix'),
+    ('substring, selective', '98765', 'substring'),
+]
+
+MERCHANTS = [
+    'Fresh Grocery', 'City Supermarket', 'Uber Trip', 'Shell Fuel', 'Java Coffee', 'Kenya Power',
+    'Safaricom Airtime', 'Netflix Subscription', 'Pharmacy Plus', 'Book Corner', 'Gym Membership',
+    'Water Utility', 'Rent Payment', 'Bolt Ride', 'Pizza Inn', 'Hardware Store', 'Cinema Tickets',
+    'Insurance Premium', 'School Fees', 'Salon Visit',
+]
+CITIES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret']
+
+CATEGORIES_PER_USER = 4
+BUDGET_MONTHS = 24
+REPORTS_PER_USER = 50
+
+BenchmarkResult = namedtuple('BenchmarkResult', ['name', 'with_indexes', 'without_indexes'])
+
+
+def seed_benchmark_data(users, transactions):
+    """
+    Insert synthetic users with categories, transactions, budgets, reports
+    and roles using set-based SQL. Returns the ids of the new users.
+    """
+    tag = int(time.time())
+    user_ids = db.session.execute(text(
+        """
+        INSERT INTO users (username, email, password)
+        SELECT 'bench_' || :tag || '_' || g, 'bench_' || :tag || '_' || g || '@example.com', 'x'
+        FROM generate_series(1, :users) AS g
+        RETURNING id
+        """
+    ), {'tag': tag, 'users': users}).scalars().all()
+    params = {'user_ids': user_ids}
+
+    db.session.execute(text(
+        """
+        INSERT INTO categories (user_id, name, type, is_default)
+        SELECT u, 'Bench ' || c, (CASE WHEN c = 1 THEN 'income' ELSE 'expense' END)::category_type, false
+        FROM unnest(CAST(:user_ids AS integer[])) AS u, generate_series(1, :per_user) AS c
+        """
+    ), {**params, 'per_user': CATEGORIES_PER_USER})
+
+    db.session.execute(text(
+        """
+        WITH bench_categories AS (
+            SELECT id, user_id, row_number() OVER (ORDER BY id) - 1 AS n
+            FROM categories WHERE user_id = ANY(CAST(:user_ids AS integer[]))
+        )
+        INSERT INTO transactions (user_id, category_id, amount, description, timestamp)
+        SELECT c.user_id, c.id, (random() * 50000)::bigint, 'Benchmark transaction',
+               now() - random() * interval '730 days'
+        FROM generate_series(1, :transactions) AS g
+        JOIN bench_categories AS c ON c.n = g % :categories
+        """
+    ), {**params, 'transactions': transactions, 'categories': users * CATEGORIES_PER_USER})
+
+    db.session.execute(text(
+        """
+        INSERT INTO budgets (user_id, category_id, month, amount)
+        SELECT c.user_id, c.id, to_char(now() - m * interval '1 month', 'YYYY-MM'), 100000
+        FROM categories AS c, generate_series(0, :months - 1) AS m
+        WHERE c.user_id = ANY(CAST(:user_ids AS integer[])) AND c.type = 'expense'
+        """
+    ), {**params, 'months': BUDGET_MONTHS})
+
+    db.session.execute(text(
+        """
+        INSERT INTO reports (user_id, month, end_month, format, mode, status, created_at)
+        SELECT u, '2025-01', '2025-01', 'csv', 'detailed', 'done', now() - random() * interval '365 days'
+        FROM unnest(CAST(:user_ids AS integer[])) AS u, generate_series(1, :per_user)
+        """
+    ), {**params, 'per_user': REPORTS_PER_USER})
+
+    db.session.execute(text(
+        """
+        INSERT INTO user_roles (user_id, role_id)
+        SELECT u, r.id FROM unnest(CAST(:user_ids AS integer[])) AS u, roles AS r WHERE r.name = 'user'
+        """
+    ), params)
+
+    db.session.execute(text("ANALYZE users, categories, transactions, budgets, reports, user_roles"))
+    return user_ids
+
+
+def list_queries(user_id):
+    """Return `(name, query)` pairs built the way the list endpoints build them."""
+    return [
+        ('transactions', Transaction.query.filter_by(user_id=user_id).order_by(Transaction.timestamp.desc())),
+        ('transactions (admin)', Transaction.query.order_by(Transaction.timestamp.desc())),
+        ('transactions by category', Transaction.query.filter_by(user_id=user_id).filter(
+            Transaction.category_id == db.session.query(db.func.min(Category.id)).filter(
+                Category.user_id == user_id
+            ).scalar_subquery()
+        ).order_by(Transaction.timestamp.desc())),
+        ('reports', Report.query.filter_by(user_id=user_id).order_by(Report.created_at.desc())),
+        ('reports (admin)', Report.query.order_by(Report.created_at.desc())),
+        ('budgets', Budget.query.filter_by(user_id=user_id).order_by(Budget.month.desc())),
+        ('budgets (admin)', Budget.query.order_by(Budget.month.desc())),
+        ('categories', Category.query.filter(
+            (Category.is_default == True) | (Category.user_id == user_id)
+        ).order_by(Category.name.asc())),
+        ('user roles', Role.query.join(user_roles).filter(user_roles.c.user_id == user_id)),
+    ]
+
+
+def time_query(query, repeat):
+    """Return the median time in milliseconds of fetching the first page of a query."""
+    query.paginate(page=1, per_page=10, error_out=False)  # Warm up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query.paginate(page=1, per_page=10, error_out=False)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run_index_benchmark(users, transactions, repeat):
+    """
+    Seed a large dataset, time the first page of every list query with the
+    list indexes and again without them, then roll everything back.
+    """
+    try:
+        user_ids = seed_benchmark_data(users, transactions)
+        queries = list_queries(user_ids[0])
+        with_indexes = [time_query(query, repeat) for _, query in queries]
+
+        for index in LIST_INDEXES:
+            db.session.execute(text(f"DROP INDEX IF EXISTS {index}"))
+        without_indexes = [time_query(query, repeat) for _, query in queries]
+    finally:
+        db.session.rollback()
+
+    return [
+        BenchmarkResult(name, with_time, without_time)
+        for (name, _), with_time, without_time in zip(queries, with_indexes, without_indexes)
+    ]
+
+
+def seed_search_data(rows):
+    """Insert one synthetic user owning `rows` transactions with varied descriptions. Returns the user id."""
+    tag = int(time.time())
+    user_id = db.session.execute(text(
+        """
+        INSERT INTO users (username, email, password)
+        VALUES ('bench_search_' || :tag, 'bench_search_' || :tag || '@example.com', 'x')
+        RETURNING id
+        """
+    ), {'tag': tag}).scalar()
+    category_id = db.session.execute(text(
+        """
+        INSERT INTO categories (user_id, name, type, is_default)
+        VALUES (:user_id, 'Bench search', 'expense', false)
+        RETURNING id
+        """
+    ), {'user_id': user_id}).scalar()
+
+    db.session.execute(text(
+        """
+        INSERT INTO transactions (user_id, category_id, amount, description, timestamp)
+        SELECT :user_id, :category_id, (random() * 50000)::bigint,
+               'POS ' || (CAST(:merchants AS text[]))[1 + g % :merchant_count] || ' '
+                   || (CAST(:cities AS text[]))[1 + (g / 7) % :city_count] || ' #' || g,
+               now() - random() * interval '3650 days'
+        FROM generate_series(1, :rows) AS g
+        """
+    ), {
+        'user_id': user_id, 'category_id': category_id, 'rows': rows,
+        'merchants': MERCHANTS, 'merchant_count': len(MERCHANTS),
+        'cities': CITIES, 'city_count': len(CITIES),
+    })
+    db.session.execute(text("ANALYZE transactions"))
+    return user_id
+
+
+def search_query(user_id, term, mode):
+    """Build a search the way the transaction list endpoint does, or the old ILIKE when `mode` is None."""
+    query = Transaction.query.filter_by(user_id=user_id)
+    if mode is None:
+        return query.filter(Transaction.description.ilike(f'%{term}%')).order_by(Transaction.timestamp.desc())
+
+    query, rank = search_transactions(query, term, mode)
+    order = [rank.desc()] if rank is not None else []
+    return query.order_by(*order, Transaction.timestamp.desc())
+
+
+def run_search_benchmark(rows, repeat):
+    """
+    Seed one user with `rows` transactions, time the first page of each
+    search mode with the search indexes and again without them, then roll
+    everything back.
+    """
+    try:
+        user_id = seed_search_data(rows)
+        queries = [(name, search_query(user_id, term, mode)) for name, term, mode in SEARCH_CASES]
+        with_indexes = [time_query(query, repeat) for _, query in queries]
+
+        for index in SEARCH_INDEXES:
+            db.session.execute(text(f"DROP INDEX IF EXISTS {index}"))
+        without_indexes = [time_query(query, repeat) for _, query in queries]
+    finally:
+        db.session.rollback()
+
+    return [
+        BenchmarkResult(name, with_time, without_time)
+        for (name, _), with_time, without_time in zip(queries, with_indexes, without_indexes)
+    ]
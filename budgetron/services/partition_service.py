@@ -0,0 +1,184 @@
+"""Module for maintaining the monthly partitions of the transactions table."""
+from collections import namedtuple
+
+from sqlalchemy import text
+
+from budgetron.models import MonthlyCategoryTotal, Transaction
+from budgetron.services.report_service import transaction_summary_query
+from budgetron.services.stats_service import stats_query
+from budgetron.utils.db import db
+from budgetron.utils.explain import explain, plan_nodes
+from budgetron.utils.months import current_month, month_bounds, next_month, parse_month
+from budgetron.utils.versioning import bump_versions, list_key, transactions_key
+
+PARTITIONED_TABLE = 'transactions'
+
+# Catches transactions outside every monthly partition
+DEFAULT_PARTITION = 'transactions_default'
+
+# Future months kept partitioned ahead of time
+PARTITION_MONTHS_AHEAD = 3
+
+# Columns copied when rows move between partitions; search_vector is generated
+PARTITION_COLUMNS = 'id, user_id, category_id, amount, description, timestamp'
+
+Partition = namedtuple('Partition', ['name', 'bounds', 'rows'])
+PruningCheck = namedtuple('PruningCheck', ['name', 'query'])
+PruningCheckResult = namedtuple('PruningCheckResult', ['name', 'expected', 'passed', 'partitions'])
+
+
+def partition_name(month):
+    """Return the name of the partition holding a 'YYYY-MM' month."""
+    return f"{PARTITIONED_TABLE}_{month.replace('-', '_')}"
+
+
+def archive_name(month):
+    """Return the name a detached partition of a 'YYYY-MM' month is kept under."""
+    return f"{PARTITIONED_TABLE}_archive_{month.replace('-', '_')}"
+
+
+def partition_month(name):
+    """Return the 'YYYY-MM' month of a monthly partition name, or None."""
+    suffix = name[len(PARTITIONED_TABLE) + 1:]
+    try:
+        return parse_month(suffix.replace('_', '-')).strftime('%Y-%m')
+    except ValueError:
+        return None
+
+
+def list_partitions():
+    """Return the attached partitions of the transactions table, ordered by name."""
+    rows = db.session.execute(text(
+        """
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid), child.reltuples::bigint
+        FROM pg_inherits
+        JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table AND child.relkind IN ('r', 'p')
+        ORDER BY child.relname
+        """
+    ), {'table': PARTITIONED_TABLE})
+    # reltuples is -1 until the partition is first analyzed
+    return [Partition(name, bounds, max(rows, 0)) for name, bounds, rows in rows]
+
+
+def create_partition(month):
+    """
+    Create the partition of a 'YYYY-MM' month within the current database
+    transaction. Returns False if it already exists.
+
+    Rows of the month that landed in the default partition are moved into the
+    new one, as Postgres refuses to create a partition whose rows the default
+    partition holds.
+    """
+    name = partition_name(month)
+    if name in {partition.name for partition in list_partitions()}:
+        return False
+
+    start, end = month_bounds(month)
+    bounds = {'start': start, 'end': end}
+    db.session.execute(text(
+        f"""
+        CREATE TEMPORARY TABLE moved_transactions ON COMMIT DROP AS
+        SELECT {PARTITION_COLUMNS} FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end
+        """
+    ), bounds)
+    db.session.execute(text(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end"
+    ), bounds)
+    db.session.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {PARTITIONED_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    db.session.execute(text(
+        f"INSERT INTO {PARTITIONED_TABLE} ({PARTITION_COLUMNS}) SELECT {PARTITION_COLUMNS} FROM moved_transactions"
+    ))
+    db.session.execute(text("DROP TABLE moved_transactions"))
+    return True
+
+
+def create_future_partitions(months_ahead=PARTITION_MONTHS_AHEAD):
+    """Create the partitions of the current month and the next `months_ahead` months. Returns the new names."""
+    created = []
+    month = current_month()
+    for _ in range(months_ahead + 1):
+        if create_partition(month):
+            created.append(partition_name(month))
+        month = next_month(month)
+
+    db.session.commit()
+    return created
+
+
+def archive_partitions(before_month, drop=False):
+    """
+    Detach the monthly partitions of the months before `before_month`, and
+    keep each as a standalone `transactions_archive_YYYY_MM` table, or drop it.
+
+    Their transactions leave the API, so the rollups of those months are
+    deleted and the data versions of the affected users bumped. Returns the
+    archived months.
+    """
+    months = sorted(
+        month for month in (partition_month(partition.name) for partition in list_partitions())
+        if month is not None and month < before_month
+    )
+
+    for month in months:
+        start, end = month_bounds(month)
+        user_ids = [
+            user_id for user_id, in db.session.query(Transaction.user_id).filter(
+                Transaction.timestamp >= start, Transaction.timestamp < end
+            ).distinct()
+        ]
+        bump_versions(
+            *(transactions_key(user_id, month) for user_id in user_ids),
+            *(list_key('transactions', user_id) for user_id in user_ids),
+        )
+        MonthlyCategoryTotal.query.filter_by(month=month).delete(synchronize_session=False)
+
+        name = partition_name(month)
+        db.session.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"))
+        if drop:
+            db.session.execute(text(f"DROP TABLE {name}"))
+        else:
+            db.session.execute(text(f"ALTER TABLE {name} RENAME TO {archive_name(month)}"))
+
+    db.session.commit()
+    return months
+
+
+def pruning_queries(user_id, month):
+    """Return month-scoped queries of the API that should read a single partition."""
+    start, end = month_bounds(month)
+    return [
+        PruningCheck(
+            'transaction date range',
+            Transaction.query.filter(
+                Transaction.user_id == user_id,
+                Transaction.timestamp >= start,
+                Transaction.timestamp < end,
+            ),
+        ),
+        PruningCheck('report rows', transaction_summary_query(user_id, month)),
+        PruningCheck('daily stats', stats_query(user_id, 'day', 'category', start, end)),
+    ]
+
+
+def check_partition_pruning(user_id, month=None):
+    """
+    EXPLAIN month-scoped queries and check the planner prunes every partition
+    but the month's own (or the default partition, if the month has none).
+    """
+    month = month or current_month()
+    names = {partition.name for partition in list_partitions()}
+    expected = partition_name(month) if partition_name(month) in names else DEFAULT_PARTITION
+
+    results = []
+    for check in pruning_queries(user_id, month):
+        scanned = sorted({
+            node['Relation Name'] for node in plan_nodes(explain(check.query))
+            if node.get('Relation Name') in names
+        })
+        results.append(PruningCheckResult(check.name, expected, scanned == [expected], scanned))
+    return results
@@ -0,0 +1,118 @@
+"""Module for checking that hot queries are served by indexes."""
+from collections import namedtuple
+
+from budgetron.models import Budget, Category, Report, Role, Transaction, user_roles
+from budgetron.services.report_service import transaction_summary_query
+from budgetron.utils.explain import explain, index_names, partition_parents, plan_nodes
+from budgetron.utils.months import current_month, month_bounds
+
+IndexCheck = namedtuple('IndexCheck', ['name', 'query', 'table', 'index'])
+IndexCheckResult = namedtuple(
+    'IndexCheckResult', ['name', 'index', 'passed', 'preferred', 'indexes', 'node_types']
+)
+
+# Small development tables are cheaper to scan sequentially, which would hide
+# whether an index can be used at all
+PLANNER_SETTINGS = {'enable_seqscan': 'off'}
+
+# Plan nodes that read a table through an index
+INDEX_SCAN_TYPES = {'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan'}
+
+
+def hot_queries(user_id, month=None):
+    """Return the hot queries of the API with the index each should use."""
+    month = month or current_month()
+    start, end = month_bounds(month)
+    return [
+        IndexCheck(
+            'transaction list',
+            Transaction.query.filter_by(user_id=user_id).order_by(Transaction.timestamp.desc()).limit(10),
+            'transactions',
+            'ix_transactions_user_timestamp',
+        ),
+        IndexCheck(
+            'transaction date range',
+            Transaction.query.filter(
+                Transaction.user_id == user_id,
+                Transaction.timestamp >= start,
+                Transaction.timestamp < end,
+            ),
+            'transactions',
+            'ix_transactions_user_timestamp',
+        ),
+        IndexCheck(
+            'transaction category date range',
+            Transaction.query.filter(
+                Transaction.user_id == user_id,
+                Transaction.category_id == 1,
+                Transaction.timestamp >= start,
+                Transaction.timestamp < end,
+            ),
+            'transactions',
+            'ix_transactions_user_category_timestamp',
+        ),
+        IndexCheck(
+            'report rows',
+            transaction_summary_query(user_id, month),
+            'transactions',
+            'ix_transactions_user_timestamp',
+        ),
+        IndexCheck(
+            'budget list',
+            Budget.query.filter_by(user_id=user_id).order_by(Budget.month.desc()).limit(10),
+            'budgets',
+            'ix_budgets_user_month',
+        ),
+        IndexCheck(
+            'report list',
+            Report.query.filter_by(user_id=user_id).order_by(Report.created_at.desc()).limit(10),
+            'reports',
+            'ix_reports_user_created_at',
+        ),
+        IndexCheck(
+            'category list',
+            Category.query.filter(
+                (Category.is_default == True) | (Category.user_id == user_id)
+            ).order_by(Category.name.asc()).limit(10),
+            'categories',
+            'ix_categories_user_id_name',
+        ),
+        IndexCheck(
+            'user roles',
+            Role.query.join(user_roles).filter(user_roles.c.user_id == user_id),
+            'user_roles',
+            'ix_user_roles_user_id_role_id',
+        ),
+    ]
+
+
+def check_indexes(user_id, month=None):
+    """
+    EXPLAIN every hot query. A check passes when its table is read through an
+    index rather than a sequential scan; `preferred` tells whether the planner
+    picked the expected index, which depends on how selective the filters are
+    in the current data.
+    """
+    # Scans of a partition count as scans of the partitioned table
+    parents = partition_parents()
+    results = []
+    for check in hot_queries(user_id, month):
+        plan = explain(check.query, settings=PLANNER_SETTINGS)
+        nodes = list(plan_nodes(plan))
+        indexes = index_names(plan, parents)
+        tables = [parents.get(node.get('Relation Name'), node.get('Relation Name')) for node in nodes]
+        seq_scanned = any(
+            node['Node Type'] == 'Seq Scan' and table == check.table for node, table in zip(nodes, tables)
+        )
+        index_scanned = any(
+            node['Node Type'] in INDEX_SCAN_TYPES and table == check.table for node, table in zip(nodes, tables)
+        )
+        results.append(IndexCheckResult(
+            name=check.name,
+            index=check.index,
+            passed=index_scanned and not seq_scanned,
+            preferred=check.index in indexes,
+            indexes=sorted(indexes),
+            node_types=[node['Node Type'] for node in nodes],
+        ))
+    return results
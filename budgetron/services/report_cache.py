@@ -0,0 +1,73 @@
+"""Module for reusing reports generated from unchanged data."""
+import threading
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import and_, func, or_
+
+from budgetron.models import Report
+from budgetron.utils.months import iter_months
+from budgetron.utils.versioning import get_versions, transactions_key
+
+
+class ReportCacheStats:
+    """Thread-safe hit/miss counters for the report cache of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def to_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+report_cache_stats = ReportCacheStats()
+
+
+def report_data_version(user_id, start_month, end_month):
+    """
+    Return the version of the data a report for this user and period is built
+    from. Month versions only ever increase, so their sum changes whenever any
+    month in the period does.
+    """
+    versions = get_versions(transactions_key(user_id, month) for month in iter_months(start_month, end_month))
+    return sum(versions.values())
+
+
+def find_cached_report(user_id, start_month, end_month, report_format, mode, data_version):
+    """
+    Return the latest report generated for the same user, period, format, mode
+    and data version, or `None` on a cache miss. Only finished reports and
+    reports queued less than `REPORT_JOB_TIMEOUT` seconds ago are reused, so
+    jobs lost to a crash or restart are regenerated.
+    """
+    queued_since = func.now() - timedelta(seconds=current_app.config['REPORT_JOB_TIMEOUT'])
+    report = Report.query.filter(
+        Report.user_id == user_id,
+        Report.month == start_month,
+        Report.end_month == end_month,
+        Report.format == report_format,
+        Report.mode == mode,
+        Report.data_version == data_version,
+        or_(
+            Report.status == 'done',
+            and_(Report.status.in_(('pending', 'running')), Report.created_at >= queued_since),
+        ),
+    ).order_by(Report.created_at.desc()).first()
+
+    report_cache_stats.record(hit=report is not None)
+    return report
@@ -1,58 +1,241 @@
 """Module for report generation functionality."""
 import os
 import logging
-import pandas as pd
-from flask import current_app, request
-from sqlalchemy import extract
+import time
+from sqlalchemy import BigInteger, Date, cast, func
 from datetime import datetime
 
+from budgetron.utils.db import db
 from budgetron.utils.logging_utils import log_event
-from budgetron.models import Transaction, Category
+from budgetron.models import Transaction, Category, Report
+from budgetron.services.exporters import Column, get_exporter
+from budgetron.services.report_storage import storage_path, store_report_file
+from budgetron.services.rollup_service import monthly_totals
+from budgetron.utils.money import to_major
+from budgetron.utils.months import month_bounds
 
 logger = logging.getLogger(__name__)
 
+# Columns of a detailed report, one row per transaction
+REPORT_COLUMNS = [
+    Column('Date', 12, 'timestamp'),
+    Column('Category', 16),
+    Column('Type', 10),
+    Column('Description', 48),
+    Column('Amount', 14, 'amount'),
+]
 
-def generate_transaction_summary(user_id, month):
-    """Aggregate transaction data for a given user and month."""
+# Columns of a summary report, one row per aggregated group
+SUMMARY_COLUMNS = [
+    Column('Section', 12),
+    Column('Group', 20),
+    Column('Type', 10),
+    Column('Count', 10, 'integer'),
+    Column('Total', 14, 'amount'),
+]
 
-    # Filter transactions by user and month
-    transactions = Transaction.query.join(Category, Transaction.category_id == Category.id).filter(
-        Transaction.user_id == user_id).filter(
-        extract('month', Transaction.timestamp) == int(month.split('-')[1])).filter(
-        extract('year', Transaction.timestamp) == int(month.split('-')[0])
-    ).all()
+# Number of rows fetched per round trip from the server-side cursor
+REPORT_BATCH_SIZE = 1000
 
-    data = []
-    for transaction in transactions:
-        row = {
-            'Date': transaction.timestamp.strftime('%d-%m-%Y'),
-            'Category': transaction.category.name,
-            'Type': transaction.category.type,
-            'Description': transaction.description,
-            'Amount': transaction.amount
-        }
-        data.append(row)
 
-    return data
+def transaction_filters(user_id, start_month, end_month=None):
+    """
+    Return the filters selecting a user's transactions from `start_month`
+    to `end_month` (or just `start_month`), both in 'YYYY-MM' format.
+    """
+    start, end = month_bounds(start_month, end_month)
+    return [
+        Transaction.user_id == user_id,
+        Transaction.timestamp >= start,
+        Transaction.timestamp < end,
+    ]
+
+
+def transaction_summary_query(user_id, start_month, end_month=None):
+    """Build a column-only query for the transactions of a given user and period."""
+    return db.session.query(
+        Transaction.timestamp,
+        Category.name,
+        Category.type,
+        Transaction.description,
+        Transaction.amount,
+    ).join(Category, Transaction.category_id == Category.id).filter(
+        *transaction_filters(user_id, start_month, end_month)
+    )
+
+
+def has_transactions(user_id, start_month, end_month=None):
+    """Check whether a user has any transactions in the given period."""
+    query = transaction_summary_query(user_id, start_month, end_month)
+    return db.session.query(query.exists()).scalar()
+
+
+def generate_transaction_summary(user_id, start_month, end_month=None):
+    """
+    Yield `(timestamp, category, type, description, amount)` report rows
+    for a given user and period.
+
+    Rows are read from a server-side cursor in batches of `REPORT_BATCH_SIZE`,
+    so only one batch is held in memory at a time.
+    """
+    query = transaction_summary_query(user_id, start_month, end_month).order_by(
+        Transaction.timestamp, Transaction.id
+    )
+
+    for timestamp, category, category_type, description, amount in query.yield_per(REPORT_BATCH_SIZE):
+        yield timestamp, category, category_type, description, to_major(amount)
+
+
+def summarize_transactions(user_id, start_month, end_month=None):
+    """
+    Aggregate a user's transactions for a period, returning totals per
+    category, per type and per month, and the net balance, in minor units.
+
+    Totals come from per-month rollups. Single-month summaries also include
+    per-day totals, grouped inside the database.
+    """
+    end_month = end_month or start_month
+    monthly = monthly_totals(user_id, start_month, end_month)
+
+    categories = {}
+    months = {}
+    types = {
+        category_type: {'type': category_type, 'count': 0, 'total': 0}
+        for category_type in ('income', 'expense')
+    }
+    for month, category_id, name, category_type, row_count, row_total in monthly:
+        category = categories.setdefault(
+            category_id, {'category': name, 'type': category_type, 'count': 0, 'total': 0}
+        )
+        period = months.setdefault(
+            (month, category_type), {'month': month, 'type': category_type, 'count': 0, 'total': 0}
+        )
+        for totals in (category, period, types[category_type]):
+            totals['count'] += row_count
+            totals['total'] += row_total
+
+    days = []
+    if start_month == end_month:
+        count = func.count(Transaction.id)
+        # Postgres sums BIGINT columns as NUMERIC, cast back to keep integer minor units
+        total = cast(func.sum(Transaction.amount), BigInteger)
+        day = cast(Transaction.timestamp, Date)
+        days = [
+            {'date': row_day, 'type': category_type, 'count': row_count, 'total': row_total}
+            for row_day, category_type, row_count, row_total in db.session.query(
+                day, Category.type, count, total).join(
+                Category, Transaction.category_id == Category.id).filter(
+                *transaction_filters(user_id, start_month)).group_by(
+                day, Category.type).order_by(day, Category.type)
+        ]
 
+    return {
+        'start_month': start_month,
+        'end_month': end_month,
+        'categories': sorted(categories.values(), key=lambda item: (item['type'], -item['total'])),
+        'types': list(types.values()),
+        'months': [months[key] for key in sorted(months)],
+        'days': days,
+        'net_balance': types['income']['total'] - types['expense']['total'],
+    }
 
-def save_csv_report(user_id, data_rows, month):
+
+def generate_summary_rows(user_id, start_month, end_month=None):
+    """Yield the sections of a summary report as `(section, group, type, count, total)` rows."""
+    summary = summarize_transactions(user_id, start_month, end_month)
+
+    for item in summary['categories']:
+        yield ['Category', item['category'], item['type'], item['count'], to_major(item['total'])]
+
+    for item in summary['types']:
+        yield ['Type', item['type'], item['type'], item['count'], to_major(item['total'])]
+
+    if summary['start_month'] != summary['end_month']:
+        for item in summary['months']:
+            yield ['Month', item['month'], item['type'], item['count'], to_major(item['total'])]
+
+    for item in summary['days']:
+        yield ['Day', item['date'], item['type'], item['count'], to_major(item['total'])]
+
+    transaction_count = sum(item['count'] for item in summary['types'])
+    yield ['Net balance', None, None, transaction_count, to_major(summary['net_balance'])]
+
+
+def save_report(report, data_rows, columns=REPORT_COLUMNS):
     """
-    Save data rows in a CSV file and return the filepath if
-    successful, otherwise return `None`.
+    Export data rows to the file of a report as they are produced, move it
+    into report storage and return the `ExportResult` and stored file as
+    `(result, storage_key, size, etag)`. Errors, including those of the query
+    producing the rows, are raised once the partial file is removed.
     """
+    report_format = report.format
+    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    basename = f"report_{report.user_id}_{report.period}_{report.id}_{timestamp}"
+    filepath = storage_path(f"{basename}.tmp")
     try:
-        filename = f"report_{user_id}_{month}_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv"
-        filepath = os.path.join(current_app.root_path, 'static', 'reports', filename)
+        exporter = get_exporter(report_format)
+        filename = f"{basename}.{exporter.extension}"
 
-        # Save transactions to CSV
-        df = pd.DataFrame(data_rows)
-        df.to_csv(filepath, index=False)
+        result = exporter.export(filepath, columns, data_rows)
+        storage_key, size, etag = store_report_file(filepath, filename, compress=exporter.compressible)
 
-        log_event(action='csv_report_save_success', details={'file_path': filepath})
+        log_event(action='report_save_success', details={
+            'storage_key': storage_key,
+            'format': report_format,
+            'rows': result.row_count,
+            'bytes': result.bytes_written,
+            'stored_bytes': size,
+            'elapsed': result.elapsed,
+        })
 
-        return f"{request.host_url}static/reports/{filename}"
+        return result, storage_key, size, etag
 
     except Exception as e:
-        log_event('csv_report_save_failed', status='failure', details={'error': str(e)})
-        return None
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        log_event('report_save_failed', status='failure', details={'format': report_format, 'error': str(e)})
+        raise
+
+
+def run_report_job(report_id, base_url):
+    """
+    Generate the file for a pending report and record the outcome on the
+    `Report` row. Runs on a background worker inside an app context.
+    """
+    report = db.session.get(Report, report_id)
+    if report is None:
+        return
+
+    report.status = 'running'
+    db.session.commit()
+
+    started = time.perf_counter()
+    try:
+        if report.mode == 'summary':
+            rows = generate_summary_rows(report.user_id, report.month, report.end_month)
+            columns = SUMMARY_COLUMNS
+        else:
+            rows = generate_transaction_summary(report.user_id, report.month, report.end_month)
+            columns = REPORT_COLUMNS
+
+        result, storage_key, size, etag = save_report(report, rows, columns)
+        report.storage_key = storage_key
+        report.etag = etag
+        report.file_url = f"{base_url}api/reports/{report.id}/download"
+        report.row_count = result.row_count
+        report.file_size = size
+        report.status = 'done'
+        report.error = None
+
+    except Exception as e:
+        db.session.rollback()
+        report.status = 'failed'
+        report.error = str(e)
+        log_event('report_job_failed', status='failure', level='error', details={
+            'report_id': report_id,
+            'error': str(e),
+        })
+
+    report.duration = round(time.perf_counter() - started, 3)
+    report.completed_at = datetime.now()
+    db.session.commit()
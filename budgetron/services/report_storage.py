@@ -0,0 +1,200 @@
+"""Module for storing, serving and expiring report files."""
+import gzip
+import hashlib
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from flask import current_app, request, send_file, Response
+from flask_restful import abort
+
+from budgetron.models import Report
+from budgetron.services.exporters import get_exporter
+from budgetron.utils.db import db
+from budgetron.utils.logging_utils import log_event
+
+COMPRESSED_SUFFIX = '.gz'
+CHUNK_SIZE = 64 * 1024
+
+
+def storage_path(storage_key):
+    """Return the absolute path of a stored report file."""
+    return os.path.join(current_app.config['REPORT_STORAGE_DIR'], storage_key)
+
+
+def file_digest(filepath):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_report_file(filepath, filename, compress):
+    """
+    Move a freshly written report file into storage under `filename`,
+    gzip-compressing it if requested, and return its `(storage_key, size, etag)`.
+    """
+    storage_key = filename
+    if compress:
+        storage_key += COMPRESSED_SUFFIX
+        with open(filepath, 'rb') as source, open(storage_path(storage_key), 'wb') as target:
+            # A fixed mtime keeps the output, and so the ETag, reproducible
+            with gzip.GzipFile(fileobj=target, mode='wb', mtime=0) as compressed:
+                shutil.copyfileobj(source, compressed, CHUNK_SIZE)
+        os.remove(filepath)
+    else:
+        os.replace(filepath, storage_path(storage_key))
+
+    path = storage_path(storage_key)
+    return storage_key, os.path.getsize(path), file_digest(path)
+
+
+def delete_report_file(storage_key):
+    """Delete a stored report file, ignoring files that are already gone."""
+    if not storage_key:
+        return
+    try:
+        os.remove(storage_path(storage_key))
+    except FileNotFoundError:
+        pass
+
+
+def not_modified(etag):
+    """Build an empty `304 Not Modified` response."""
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def send_report_file(report):
+    """
+    Serve a stored report file with a strong ETag.
+
+    Conditional and Range requests are answered by Werkzeug, or the transfer
+    is handed to a front proxy when `REPORT_SENDFILE` is 'x-sendfile' or
+    'x-accel'. Compressed files are sent as-is to clients that accept gzip
+    and decompressed on the fly for the rest.
+    """
+    path = storage_path(report.storage_key) if report.storage_key else None
+    if not path or not os.path.exists(path):
+        abort(404, message="Report file not found.")
+
+    exporter = get_exporter(report.format)
+    download_name = f"report_{report.period}_{report.id}.{exporter.extension}"
+    compressed = report.storage_key.endswith(COMPRESSED_SUFFIX)
+
+    if compressed and not request.accept_encodings['gzip']:
+        etag = f"{report.etag}-identity"
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+
+        def generate():
+            with gzip.open(path, 'rb') as file:
+                while chunk := file.read(CHUNK_SIZE):
+                    yield chunk
+
+        response = Response(generate(), mimetype=exporter.content_type)
+        response.set_etag(etag)
+    else:
+        sendfile = current_app.config.get('REPORT_SENDFILE')
+        if sendfile in ('x-sendfile', 'x-accel'):
+            if request.if_none_match.contains(report.etag):
+                return not_modified(report.etag)
+
+            response = Response(mimetype=exporter.content_type)
+            response.set_etag(report.etag)
+            if sendfile == 'x-sendfile':
+                response.headers['X-Sendfile'] = path
+            else:
+                prefix = current_app.config['REPORT_ACCEL_PREFIX'].rstrip('/')
+                response.headers['X-Accel-Redirect'] = f"{prefix}/{report.storage_key}"
+        else:
+            response = send_file(path, mimetype=exporter.content_type, etag=report.etag, conditional=True)
+
+        if compressed:
+            response.headers['Content-Encoding'] = 'gzip'
+
+    response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def fail_stale_reports(timeout):
+    """
+    Mark reports still pending or running `timeout` seconds after they were
+    queued as failed, as their job was lost to a crash or restart. Returns
+    the number of reports marked.
+    """
+    cutoff = datetime.now() - timedelta(seconds=timeout)
+    failed = Report.query.filter(
+        Report.status.in_(('pending', 'running')),
+        Report.created_at < cutoff,
+    ).update({
+        'status': 'failed',
+        'error': "The report job did not finish in time.",
+        'completed_at': datetime.now(),
+    }, synchronize_session=False)
+    db.session.commit()
+
+    log_event('stale_reports_failed', details={'failed': failed, 'timeout': timeout})
+    return failed
+
+
+def sweep_expired_reports(retention_days, batch_size=500):
+    """
+    Delete reports older than `retention_days`, with their files, in batches.
+    Reports that are still running are left alone. Returns the number deleted.
+    """
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    deleted = 0
+
+    while True:
+        expired = Report.query.with_entities(Report.id, Report.storage_key).filter(
+            Report.created_at < cutoff,
+            Report.status != 'running',
+        ).order_by(Report.id).limit(batch_size).all()
+        if not expired:
+            break
+
+        Report.query.filter(Report.id.in_([report_id for report_id, _ in expired])).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        deleted += len(expired)
+
+        # Only once the rows are gone: a file left behind by a failure is harmless,
+        # a row pointing at a deleted file is not
+        for _, storage_key in expired:
+            delete_report_file(storage_key)
+
+    log_event('reports_swept', details={'deleted': deleted, 'retention_days': retention_days})
+    return deleted
+
+
+def adopt_legacy_report_files():
+    """
+    Move report files written to the public static/reports folder, before
+    reports had a storage key, into report storage and point their reports
+    at the download endpoint. Returns `(adopted, missing)` report counts.
+    """
+    adopted = missing = 0
+    legacy = Report.query.filter(Report.storage_key.is_(None), Report.file_url.like('%/static/reports/%')).all()
+    for report in legacy:
+        prefix, filename = report.file_url.split('static/reports/', 1)
+        filepath = os.path.join(current_app.root_path, 'static', 'reports', filename)
+        if not os.path.exists(filepath):
+            missing += 1
+            continue
+
+        exporter = get_exporter(report.format)
+        report.storage_key, report.file_size, report.etag = store_report_file(
+            filepath, filename, compress=exporter.compressible
+        )
+        report.file_url = f"{prefix}api/reports/{report.id}/download"
+        db.session.commit()
+        adopted += 1
+
+    log_event('report_files_adopted', details={'adopted': adopted, 'missing': missing})
+    return adopted, missing
@@ -0,0 +1,130 @@
+"""Module for the per-month, per-category transaction rollups."""
+from sqlalchemy import BigInteger, cast, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from budgetron.models import Category, MonthlyCategoryTotal, Transaction
+from budgetron.utils.db import db
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Add `{(user_id, category_id, month): (count, total)}` deltas to the rollups
+    within the current database transaction, and return the resulting
+    `{(user_id, category_id, month): total}`. Rows left with no transactions
+    are removed.
+    """
+    # Sorted to keep a consistent lock order between concurrent writers
+    rows = [
+        {'user_id': user_id, 'category_id': category_id, 'month': month, 'count': count, 'total': total}
+        for (user_id, category_id, month), (count, total) in sorted(deltas.items())
+    ]
+    if not rows:
+        return {}
+
+    table = MonthlyCategoryTotal.__table__
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'category_id', 'month'],
+        set_={
+            'count': table.c.count + stmt.excluded.count,
+            'total': table.c.total + stmt.excluded.total,
+        },
+    ).returning(table.c.user_id, table.c.category_id, table.c.month, table.c.count, table.c.total)
+    totals = {}
+    for user_id, category_id, month, count, total in db.session.execute(stmt):
+        totals[(user_id, category_id, month)] = total if count > 0 else 0
+
+    MonthlyCategoryTotal.query.filter(
+        tuple_(MonthlyCategoryTotal.user_id, MonthlyCategoryTotal.category_id, MonthlyCategoryTotal.month).in_(
+            list(deltas)
+        ),
+        MonthlyCategoryTotal.count <= 0,
+    ).delete(synchronize_session=False)
+    return totals
+
+
+def aggregate_transactions(user_id=None):
+    """
+    Return a query of `(user_id, category_id, month, count, total)` rows
+    aggregated from raw transactions, for one user or everyone.
+    """
+    month = func.to_char(Transaction.timestamp, 'YYYY-MM')
+    query = db.session.query(
+        Transaction.user_id, Transaction.category_id, month, func.count(Transaction.id),
+        cast(func.sum(Transaction.amount), BigInteger),
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    return query.group_by(Transaction.user_id, Transaction.category_id, month)
+
+
+def rebuild_rollups(user_id=None):
+    """Recompute the rollups from raw transactions. Returns the number of rows written."""
+    rollups = MonthlyCategoryTotal.query
+    if user_id is not None:
+        rollups = rollups.filter(MonthlyCategoryTotal.user_id == user_id)
+
+    rollups.delete(synchronize_session=False)
+    db.session.execute(
+        insert(MonthlyCategoryTotal).from_select(
+            ['user_id', 'category_id', 'month', 'count', 'total'], aggregate_transactions(user_id)
+        )
+    )
+    written = rollups.count()
+    db.session.commit()
+    return written
+
+
+def verify_rollups(user_id=None):
+    """
+    Compare the rollups with totals aggregated from raw transactions. Amounts
+    are integer minor units, so totals must match exactly. Returns
+    `(key, expected, actual)` tuples for every mismatching row, where
+    `expected` and `actual` are `(count, total)` pairs or None when missing.
+    """
+    expected = {
+        (row_user_id, category_id, month): (count, total)
+        for row_user_id, category_id, month, count, total in aggregate_transactions(user_id)
+    }
+    stored = db.session.query(
+        MonthlyCategoryTotal.user_id,
+        MonthlyCategoryTotal.category_id,
+        MonthlyCategoryTotal.month,
+        MonthlyCategoryTotal.count,
+        MonthlyCategoryTotal.total,
+    )
+    if user_id is not None:
+        stored = stored.filter(MonthlyCategoryTotal.user_id == user_id)
+    actual = {
+        (row_user_id, category_id, month): (count, total)
+        for row_user_id, category_id, month, count, total in stored
+    }
+
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys()):
+        want, have = expected.get(key), actual.get(key)
+        if want != have:
+            mismatches.append((key, want, have))
+    return mismatches
+
+
+def monthly_totals(user_id, start_month, end_month):
+    """
+    Return sorted `(month, category_id, category_name, category_type, count, total)`
+    rollup rows for every month in the range. Rollups are maintained on write,
+    so months without transactions simply have no rows and nothing is
+    recomputed on read.
+    """
+    return sorted(
+        tuple(row) for row in db.session.query(
+            MonthlyCategoryTotal.month,
+            MonthlyCategoryTotal.category_id,
+            Category.name,
+            Category.type,
+            MonthlyCategoryTotal.count,
+            MonthlyCategoryTotal.total,
+        ).join(Category, MonthlyCategoryTotal.category_id == Category.id).filter(
+            MonthlyCategoryTotal.user_id == user_id,
+            MonthlyCategoryTotal.month.between(start_month, end_month),
+        )
+    )
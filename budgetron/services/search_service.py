@@ -0,0 +1,56 @@
+"""Module for searching transaction descriptions."""
+import re
+
+from sqlalchemy import false, func
+
+from budgetron.models import SEARCH_CONFIG, Transaction
+from budgetron.utils.db import db
+
+SEARCH_MODES = ('prefix', 'fulltext', 'substring')
+DEFAULT_SEARCH_MODE = 'substring'
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def escape_like(term):
+    """Escape the LIKE wildcards of a search term."""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def prefix_tsquery(term):
+    """
+    Build a tsquery matching descriptions with words starting with every
+    word of the term, e.g. 'gro sup' matches 'Grocery supermarket'.
+    Returns None when the term has no words.
+    """
+    words = WORD_PATTERN.findall(term.lower())
+    if not words:
+        return None
+    return func.to_tsquery(SEARCH_CONFIG, ' & '.join(f"{word}:*" for word in words))
+
+
+def search_transactions(query, term, mode=DEFAULT_SEARCH_MODE):
+    """
+    Filter a transaction query by a search term and return `(query, rank)`,
+    where `rank` is an expression to order by, or None for unranked modes.
+
+    - 'prefix' matches words starting with each search word (search as you type)
+    - 'fulltext' accepts web search syntax: quoted phrases, 'or' and '-word'
+    - 'substring' matches the term anywhere in the description
+
+    Prefix and full text searches use the GIN-indexed `search_vector` and are
+    ranked; substring searches are served by the pg_trgm index. Other
+    database dialects fall back to an unranked case-insensitive LIKE.
+    """
+    if mode == 'substring' or db.engine.dialect.name != 'postgresql':
+        return query.filter(Transaction.description.ilike(f"%{escape_like(term)}%", escape='\\')), None
+
+    if mode == 'prefix':
+        tsquery = prefix_tsquery(term)
+        if tsquery is None:
+            return query.filter(false()), None
+    else:
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, term)
+
+    rank = func.ts_rank_cd(Transaction.search_vector, tsquery)
+    return query.filter(Transaction.search_vector.op('@@')(tsquery)), rank
@@ -0,0 +1,183 @@
+"""Module for time-series statistics of transactions."""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import BigInteger, cast, func, literal_column
+
+from budgetron.models import Category, Transaction
+from budgetron.services.report_cache import ReportCacheStats, report_data_version
+from budgetron.utils.db import db
+from budgetron.utils.lookups import get_many
+
+STATS_INTERVALS = ('day', 'week', 'month')
+STATS_GROUPS = ('category', 'type')
+
+# Buckets covered when no start date is given
+DEFAULT_STATS_BUCKETS = {'day': 31, 'week': 26, 'month': 12}
+
+# Most buckets a single request may span
+MAX_STATS_BUCKETS = 1000
+
+# Closed-bucket results kept per process
+STATS_CACHE_SIZE = 256
+
+# Approximate bucket lengths, used to bound the number of buckets of a range
+BUCKET_DAYS = {'day': 1, 'week': 7, 'month': 28}
+
+
+def bucket_start(moment, interval):
+    """Return the start of the bucket containing `moment`, as Postgres `date_trunc` does."""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def shift_buckets(start, interval, count):
+    """Return the start of the bucket `count` buckets before the one starting at `start`."""
+    if interval == 'month':
+        month = start.year * 12 + start.month - 1 - count
+        return start.replace(year=month // 12, month=month % 12 + 1)
+    return start - timedelta(days=BUCKET_DAYS[interval] * count)
+
+
+def default_start(interval, now):
+    """Return the start of the default range: the last `DEFAULT_STATS_BUCKETS` buckets up to now."""
+    return shift_buckets(bucket_start(now, interval), interval, DEFAULT_STATS_BUCKETS[interval] - 1)
+
+
+def to_naive(moment):
+    """
+    Return `moment` as a naive local datetime, the form transaction timestamps
+    are stored and compared in, converting it if it carries a UTC offset.
+    """
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def bucket_count(start, end, interval):
+    """Return an upper bound of the number of buckets between `start` and `end`."""
+    return (end - start).days // BUCKET_DAYS[interval] + 2
+
+
+class StatsCache:
+    """
+    A thread-safe LRU cache of the statistics of closed buckets, which no
+    longer receive new transactions. Entries carry the data version of the
+    months they cover, so backdated writes and imports invalidate them.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.stats = ReportCacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, data_version):
+        """Return the cached rows for `key` at `data_version`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry[0] == data_version
+            if hit:
+                self._entries.move_to_end(key)
+        self.stats.record(hit)
+        return entry[1] if hit else None
+
+    def put(self, key, data_version, rows):
+        """Store the rows for `key`, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (data_version, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+stats_cache = StatsCache(STATS_CACHE_SIZE)
+
+
+def stats_query(user_id, interval, group_by, start, end, category_id=None, category_type=None):
+    """
+    Build the query aggregating a user's transactions from `start` (inclusive)
+    to `end` (exclusive) into `(bucket, group, count, sum, avg, min, max)` rows
+    with a single `date_trunc` and `GROUP BY`. The group is a category id or a
+    category type, and amounts are minor units.
+    """
+    # The interval is inlined so the select and GROUP BY expressions are identical
+    bucket = func.date_trunc(literal_column(f"'{interval}'"), Transaction.timestamp)
+    group = Transaction.category_id if group_by == 'category' else Category.type
+
+    query = db.session.query(
+        bucket,
+        group,
+        func.count(Transaction.id),
+        cast(func.sum(Transaction.amount), BigInteger),
+        cast(func.round(func.avg(Transaction.amount)), BigInteger),
+        func.min(Transaction.amount),
+        func.max(Transaction.amount),
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.timestamp >= start,
+        Transaction.timestamp < end,
+    )
+    if group_by == 'type' or category_type:
+        query = query.join(Category, Transaction.category_id == Category.id)
+    if category_id:
+        query = query.filter(Transaction.category_id == category_id)
+    if category_type:
+        query = query.filter(Category.type == category_type)
+
+    return query.group_by(bucket, group).order_by(bucket, group)
+
+
+def stats_rows(user_id, interval, group_by, start, end, category_id=None, category_type=None):
+    """Return the rows of `stats_query` as tuples."""
+    return [tuple(row) for row in stats_query(user_id, interval, group_by, start, end, category_id, category_type)]
+
+
+def transaction_stats(user_id, interval, group_by, start, end, category_id=None, category_type=None):
+    """
+    Return the statistics of a user's transactions as `(rows, cache_hit)`.
+
+    Buckets that ended before the current one are served from `stats_cache`
+    when their months are unchanged; the current bucket is always aggregated.
+    """
+    current = bucket_start(datetime.now(), interval)
+    filters = {'category_id': category_id, 'category_type': category_type}
+    rows, cache_hit = [], None
+
+    closed_end = min(end, current)
+    if start < closed_end:
+        last_month = (closed_end - timedelta(microseconds=1)).strftime('%Y-%m')
+        data_version = report_data_version(user_id, start.strftime('%Y-%m'), last_month)
+        key = (user_id, interval, group_by, start, closed_end, category_id, category_type)
+
+        rows = stats_cache.get(key, data_version)
+        cache_hit = rows is not None
+        if rows is None:
+            rows = stats_rows(user_id, interval, group_by, start, closed_end, **filters)
+            stats_cache.put(key, data_version, rows)
+
+    if end > current:
+        rows = rows + stats_rows(user_id, interval, group_by, max(start, current), end, **filters)
+
+    return rows, cache_hit
+
+
+def columnar(rows, group_by):
+    """
+    Turn stats rows into `{column: [values]}` lists. Category groups are
+    returned as `category_id` and `group` (the category name) columns.
+    """
+    columns = ['bucket', 'group', 'count', 'sum', 'avg', 'min', 'max']
+    data = {column: [row[index] for row in rows] for index, column in enumerate(columns)}
+    if group_by == 'category':
+        categories = get_many(Category, data['group'])
+        data['category_id'] = data['group']
+        data['group'] = [
+            categories[category_id].name if category_id in categories else None for category_id in data['group']
+        ]
+    return data
@@ -0,0 +1,75 @@
+"""Module for keeping data derived from transactions up to date."""
+from collections import namedtuple
+
+from budgetron.models import MonthlyCategoryTotal
+from budgetron.services.alert_service import evaluate_budget_alerts
+from budgetron.services.rollup_service import apply_rollup_deltas
+from budgetron.utils.db import db
+from budgetron.utils.versioning import bump_versions, list_key, transactions_key
+
+# The fields of a transaction that derived data depends on
+TransactionSnapshot = namedtuple('TransactionSnapshot', ['user_id', 'category_id', 'month', 'amount'])
+
+
+def snapshot(transaction):
+    """Capture the state of a transaction before or after a write."""
+    return TransactionSnapshot(
+        user_id=transaction.user_id,
+        category_id=transaction.category_id,
+        month=transaction.timestamp.strftime('%Y-%m'),
+        amount=transaction.amount,
+    )
+
+
+def record_transaction_change(before=None, after=None):
+    """
+    Propagate a transaction write to derived data in the current database
+    transaction. Pass `after` for creates, `before` for deletes and both
+    for updates.
+    """
+    if before is not None and before == after:
+        # Derived data is unaffected, but the transaction list changed
+        bump_versions(list_key('transactions', before.user_id))
+        return
+
+    deltas = {}
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None:
+            add_delta(deltas, state, sign)
+    apply_transaction_deltas(deltas)
+
+
+def add_delta(deltas, state, sign):
+    """Add (or with `sign` -1, subtract) a transaction to `(count, total)` deltas."""
+    key = (state.user_id, state.category_id, state.month)
+    count, total = deltas.get(key, (0, 0))
+    deltas[key] = (count + sign, total + sign * state.amount)
+
+
+def apply_transaction_deltas(deltas):
+    """Update rollups, budget alerts and data versions for `{(user_id, category_id, month): (count, total)}`."""
+    totals = apply_rollup_deltas(deltas)
+    evaluate_budget_alerts(deltas, totals)
+    bump_versions(
+        *(transactions_key(user_id, month) for user_id, _, month in deltas),
+        *(list_key('transactions', user_id) for user_id, _, _ in deltas),
+    )
+
+
+def record_category_change(category_id, lists=False):
+    """
+    Bump the data versions of every user and month with transactions in a
+    category after it was renamed or changed type, as reports show its name
+    and stats group and filter by its type. The rollups tell which months
+    those are. With `lists`, the transaction and budget lists of those users
+    are bumped too, for a type change alters their filters and spending.
+    """
+    months = db.session.query(MonthlyCategoryTotal.user_id, MonthlyCategoryTotal.month).filter_by(
+        category_id=category_id
+    ).all()
+    user_ids = {user_id for user_id, _ in months} if lists else set()
+    bump_versions(
+        *(transactions_key(user_id, month) for user_id, month in months),
+        *(list_key('transactions', user_id) for user_id in user_ids),
+        *(list_key('budgets', user_id) for user_id in user_ids),
+    )
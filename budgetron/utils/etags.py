@@ -0,0 +1,111 @@
+"""Helpers for answering conditional requests on JSON resources."""
+import hashlib
+import json
+from functools import wraps
+
+from flask import Response, g, jsonify, request
+from flask_restful import abort
+from flask_restful.utils import unpack
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+
+from budgetron.utils.db import db
+from budgetron.utils.versioning import get_version_stamps
+
+# Clients may keep list responses, but must revalidate them before every use
+LIST_CACHE_CONTROL = 'private, no-cache'
+
+
+def json_etag(data):
+    """Return a digest of JSON-serializable data, stable across key order."""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def compound_etag(state, data):
+    """
+    Return the ETag of a representation `data` that includes fields derived
+    from other resources: the digest of the resource's own `state`, which
+    `check_if_match` compares, then the digest of the whole of `data`, so
+    `If-None-Match` still sees changes to the derived fields.
+    """
+    return f"{json_etag(state)}.{json_etag(data)}"
+
+
+def conditional_json(data, etag=None, weak=False, last_modified=None):
+    """
+    Build a JSON response carrying an ETag, derived from `data` unless given,
+    and an optional Last-Modified date, and answer `If-None-Match` or
+    `If-Modified-Since` with an empty `304 Not Modified`.
+    """
+    response = jsonify(data)
+    response.set_etag(etag or json_etag(data), weak=weak)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response.make_conditional(request)
+
+
+def lock_if_match(instance):
+    """
+    Reload the row of `instance` with a `FOR UPDATE` lock held until the end of
+    the database transaction if the request carries an `If-Match` header, so
+    concurrent requests with the same ETag are checked one after the other.
+    """
+    if request.if_match:
+        db.session.refresh(instance, with_for_update=True)
+
+
+def check_if_match(data):
+    """
+    Abort with `412 Precondition Failed` if the request carries an `If-Match`
+    header not matching the ETag of `data`, the current representation of
+    the resource it modifies. Of a `compound_etag`, only the first part is
+    compared, so `data` is then the resource's own state.
+    """
+    if not request.if_match or request.if_match.star_tag:
+        return
+
+    etag = json_etag(data)
+    if not any(tag.split('.', 1)[0] == etag for tag in request.if_match.as_set()):
+        abort(412, message="The resource has changed since it was last read.")
+
+
+def etag_headers(data, etag=None):
+    """Return the headers announcing the ETag of a JSON representation, derived from `data` unless given."""
+    return {'ETag': quote_etag(etag or json_etag(data))}
+
+
+def conditional_list(version_keys):
+    """
+    A decorator answering list requests with weak validators derived from
+    data versions: the ETag digests the versions of `version_keys(user_id)`
+    with the query string, and Last-Modified is the time of the latest bump.
+
+    Requests whose `If-None-Match` or `If-Modified-Since` still matches get an
+    empty 304 before the view queries or serializes anything. Admins list
+    every user's rows, which no per-user version covers, so their requests
+    are served unconditionally.
+    """
+
+    def wrapper(fn):
+        @wraps(fn)
+        def decorated(*args, **kwargs):
+            if g.user.is_admin:
+                return fn(*args, **kwargs)
+
+            versions, last_modified = get_version_stamps(version_keys(g.user.id))
+            etag = json_etag({'versions': versions, 'query': sorted(request.args.items(multi=True))})
+            headers = {'ETag': quote_etag(etag, weak=True), 'Cache-Control': LIST_CACHE_CONTROL}
+            if last_modified is not None:
+                headers['Last-Modified'] = http_date(last_modified)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                return Response(status=304, headers=headers)
+
+            data, code, view_headers = unpack(fn(*args, **kwargs))
+            if code == 200:
+                view_headers = {**view_headers, **headers}
+            return data, code, view_headers
+
+        return decorated
+
+    return wrapper
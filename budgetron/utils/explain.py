@@ -0,0 +1,62 @@
+"""Helpers for inspecting PostgreSQL query plans."""
+import json
+
+from sqlalchemy import text
+
+from budgetron.utils.db import db
+
+
+def explain(query, analyze=False, settings=None):
+    """
+    Return the JSON plan of a SQLAlchemy query or statement.
+
+    `settings` are applied with `SET LOCAL` for the duration of the EXPLAIN,
+    e.g. `{'enable_seqscan': 'off'}`. The EXPLAIN runs in a savepoint that is
+    rolled back, so it leaves the surrounding transaction as it was.
+    """
+    statement = getattr(query, 'statement', query)
+    savepoint = db.session.begin_nested()
+    connection = db.session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+
+    try:
+        for name, value in (settings or {}).items():
+            connection.exec_driver_sql(f"SET LOCAL {name} = {value}")
+        result = connection.exec_driver_sql(f"EXPLAIN ({options}) {compiled}", compiled.params).scalar()
+    finally:
+        savepoint.rollback()
+
+    plan = json.loads(result) if isinstance(result, str) else result
+    return plan[0]
+
+
+def plan_nodes(node):
+    """Yield every node of a plan tree, depth first."""
+    node = node.get('Plan', node)
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def index_names(plan, parents=None):
+    """Return the names of the indexes a plan reads, mapped through `parents` if given."""
+    parents = parents or {}
+    return {parents.get(node['Index Name'], node['Index Name']) for node in plan_nodes(plan) if 'Index Name' in node}
+
+
+def partition_parents():
+    """
+    Return a `{partition: parent}` dict of every partition of a table or
+    index, as plans of partitioned tables name the partitions they read.
+    """
+    rows = db.session.execute(text(
+        """
+        SELECT child.relname, parent.relname
+        FROM pg_inherits
+        JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relkind IN ('p', 'I')
+        """
+    ))
+    return dict(rows.all())
@@ -0,0 +1,61 @@
+"""Background job queue module."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted to a queue with no free slots."""
+
+
+class JobQueue:
+    """
+    A bounded, in-process job queue backed by a thread pool.
+
+    At most `<PREFIX>_WORKERS` jobs run at once and at most
+    `<PREFIX>_QUEUE_SIZE` more may wait; further submissions are rejected
+    so that bursts cannot tie up the app.
+    """
+
+    def __init__(self, config_prefix, app=None):
+        self.config_prefix = config_prefix
+        self.app = None
+        self._executor = None
+        self._slots = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config.get(f"{self.config_prefix}_WORKERS", 2)
+        queue_size = app.config.get(f"{self.config_prefix}_QUEUE_SIZE", 20)
+
+        self.app = app
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix=f"{self.config_prefix.lower()}-worker",
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule `fn` to run inside an application context.
+        Raises `QueueFullError` if the queue has no free slots.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError(f"{self.config_prefix.lower()} queue is full")
+
+        try:
+            return self._executor.submit(self._run, fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _run(self, fn, *args, **kwargs):
+        try:
+            with self.app.app_context():
+                return fn(*args, **kwargs)
+        finally:
+            self._slots.release()
+
+
+report_queue = JobQueue("REPORT")
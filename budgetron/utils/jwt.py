@@ -4,13 +4,14 @@ from functools import wraps
 from flask_restful import abort
 
 from budgetron.models import User
+from budgetron.utils.lookups import get_by_id
 
 jwt = JWTManager()
 
 
 @jwt.additional_claims_loader
 def add_claims(identity):
-    user = User.query.get(int(identity))
+    user = get_by_id(User, int(identity))
     return {
         "roles": [role.name for role in user.roles]
     }
@@ -30,7 +31,7 @@ def roles_required(*roles):
                 return abort(403, message="You are not authorized to perform this action.")
 
             user_id = get_jwt_identity()
-            g.user = User.query.get(user_id)
+            g.user = get_by_id(User, int(user_id))
             if not g.user:
                 return abort(401, message="User is inactive.")
 
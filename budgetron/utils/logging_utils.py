@@ -1,5 +1,5 @@
 import logging
-from flask import g, request
+from flask import g, request, has_request_context
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +13,8 @@ def log_event(action: str, user=None, level: str = "info", status: str = "succes
 
     log_msg = {
         'action': action,
-        'method': request.method,
-        'path': request.path,
+        'method': request.method if has_request_context() else None,
+        'path': request.path if has_request_context() else None,
         'username': username,
         'status': status,
         'details': details or {}
@@ -0,0 +1,76 @@
+"""Request-scoped cache of entities looked up by primary key."""
+from flask import g
+
+from budgetron.utils.db import db
+
+
+def _cache():
+    """Return the `{(model, id): instance}` cache of the current app context."""
+    if 'lookups' not in g:
+        g.lookups = {}
+    return g.lookups
+
+
+def get_by_id(model, instance_id):
+    """
+    Return the instance of `model` with the given primary key, or None.
+    Each id, found or not, is fetched at most once per request.
+    """
+    if instance_id is None:
+        return None
+
+    cache = _cache()
+    key = (model, instance_id)
+    if key not in cache:
+        cache[key] = db.session.get(model, instance_id)
+    return cache[key]
+
+
+def get_many(model, instance_ids):
+    """
+    Return a `{id: instance}` dict of the instances of `model` that exist
+    among `instance_ids`, fetching the ids not cached yet with one IN query.
+    """
+    cache = _cache()
+    instance_ids = {instance_id for instance_id in instance_ids if instance_id is not None}
+    missing = {instance_id for instance_id in instance_ids if (model, instance_id) not in cache}
+
+    if missing:
+        primary_key = model.__mapper__.primary_key[0]
+        found = {instance.id: instance for instance in model.query.filter(primary_key.in_(missing))}
+        for instance_id in missing:
+            cache[(model, instance_id)] = found.get(instance_id)
+
+    return {
+        instance_id: cache[(model, instance_id)]
+        for instance_id in instance_ids
+        if cache[(model, instance_id)] is not None
+    }
+
+
+def get_all(model):
+    """Return every instance of a small lookup table, such as roles, once per request."""
+    cache = _cache()
+    key = (model, all)
+    if key not in cache:
+        cache[key] = model.query.all()
+        for instance in cache[key]:
+            cache[(model, instance.id)] = instance
+    return cache[key]
+
+
+def prefetch_ids(items, references):
+    """
+    Warm the cache for a collection being loaded, so per-item validators hit
+    it instead of the database. `references` maps field names to models,
+    e.g. `{'category_id': Category}`.
+    """
+    if not isinstance(items, list):
+        return
+    for field, model in references.items():
+        ids = set()
+        for item in items:
+            value = item.get(field) if isinstance(item, dict) else None
+            if isinstance(value, int) and not isinstance(value, bool):
+                ids.add(value)
+        get_many(model, ids)
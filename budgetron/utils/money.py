@@ -0,0 +1,72 @@
+"""Helpers for amounts stored as integer minor units, e.g. cents."""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from marshmallow import ValidationError, fields
+
+# Digits after the decimal point of the currency: amounts are stored as
+# integers of 10 ** CURRENCY_EXPONENT minor units per major unit
+CURRENCY_EXPONENT = 2
+MINOR_UNITS = 10 ** CURRENCY_EXPONENT
+
+_QUANTUM = Decimal(1).scaleb(-CURRENCY_EXPONENT)
+# Largest amount that fits a BIGINT column
+_MAX_AMOUNT = Decimal(2 ** 63 - 1).scaleb(-CURRENCY_EXPONENT)
+
+# Float amounts this close to a whole number of minor units are taken as exact
+FLOAT_TOLERANCE = 1e-9
+
+
+def to_minor(amount):
+    """
+    Convert a major-unit amount (int, float, Decimal or numeric string) to
+    integer minor units. Raises `ValueError` for non-numeric amounts and
+    amounts with more decimal places than the currency has.
+    """
+    if isinstance(amount, bool):
+        raise ValueError("Not a valid amount.")
+    if isinstance(amount, float) and abs(amount - round(amount, CURRENCY_EXPONENT)) < FLOAT_TOLERANCE:
+        # Drop binary noise such as 0.3 + 0.6 == 0.8999999999999999 sent by clients
+        amount = round(amount, CURRENCY_EXPONENT)
+    try:
+        # Floats go through their shortest repr, so 0.1 is 10 cents and not 10.000000000000000555
+        value = Decimal(repr(amount) if isinstance(amount, float) else str(amount).strip())
+    except InvalidOperation:
+        raise ValueError("Not a valid amount.")
+    if not value.is_finite():
+        raise ValueError("Not a valid amount.")
+    if abs(value) > _MAX_AMOUNT:
+        raise ValueError("Amount is too large.")
+    if value != value.quantize(_QUANTUM, rounding=ROUND_HALF_UP):
+        raise ValueError(f"Amounts can have at most {CURRENCY_EXPONENT} decimal places.")
+    return int(value.scaleb(CURRENCY_EXPONENT))
+
+
+def to_major(minor):
+    """
+    Convert integer minor units to a major-unit float for JSON and reports.
+    A single division yields the nearest double, which prints without noise.
+    """
+    if minor is None:
+        return None
+    return int(minor) / MINOR_UNITS
+
+
+def percent(part, whole, digits=1):
+    """Return `part` as a percentage of `whole`, both in minor units, or None if `whole` is 0."""
+    return round(part * 100 / whole, digits) if whole else None
+
+
+class Money(fields.Field):
+    """An amount held as integer minor units and exchanged as a decimal number."""
+    default_error_messages = {'invalid': "Not a valid amount."}
+
+    def _serialize(self, value, attr, obj, **kwargs):
+        return to_major(value)
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if not isinstance(value, (int, float, str, Decimal)):
+            raise self.make_error('invalid')
+        try:
+            return to_minor(value)
+        except ValueError as err:
+            raise ValidationError(str(err))
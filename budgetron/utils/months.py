@@ -0,0 +1,36 @@
+"""Helpers for working with 'YYYY-MM' month strings."""
+from datetime import datetime
+
+
+def parse_month(month):
+    """Return the first instant of a 'YYYY-MM' month. Raises `ValueError` if invalid."""
+    return datetime.strptime(month, '%Y-%m')
+
+
+def next_month(month):
+    """Return the 'YYYY-MM' month after the given one."""
+    start = parse_month(month)
+    if start.month == 12:
+        return f"{start.year + 1}-01"
+    return f"{start.year}-{start.month + 1:02d}"
+
+
+def iter_months(start_month, end_month):
+    """Yield every 'YYYY-MM' month from `start_month` to `end_month` inclusive."""
+    month = start_month
+    while month <= end_month:
+        yield month
+        month = next_month(month)
+
+
+def month_bounds(start_month, end_month=None):
+    """
+    Return the half-open `[start, end)` datetime range covering the months
+    from `start_month` to `end_month` (or just `start_month`).
+    """
+    return parse_month(start_month), parse_month(next_month(end_month or start_month))
+
+
+def current_month():
+    """Return the current 'YYYY-MM' month."""
+    return datetime.now().strftime('%Y-%m')
@@ -1,35 +1,172 @@
 """Pagination utility module."""
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+
 from flask import request
+from flask_restful import abort
+from marshmallow.experimental.context import Context
+from sqlalchemy import tuple_
+
+from budgetron.utils.explain import explain
+
+# Ways of computing the `total` of a page
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+
+def paginate_query(query, schema, page=None, limit=None, dump_context=None, count='exact'):
+    """
+    Paginate a given query.
 
+    `count` is the default way `total` is computed, which clients can override
+    with a `count` query parameter:
+    - 'exact' runs a COUNT(*) over the filtered query
+    - 'estimate' uses the planner's row estimate, which costs no scan
+    - 'none' skips it; `total` and `pages` are null
 
-def paginate_query(query, schema, page=None, limit=None):
-    """Paginate a given query."""
-    page = page or 1
-    limit = limit or 10
+    `dump_context`, if given, is called with the items of the page and its
+    result is set as the marshmallow context while they are dumped.
+    """
+    # Clamped like Flask-SQLAlchemy's paginate, so OFFSET and LIMIT stay valid
+    page = max(page or 1, 1)
+    limit = max(limit or 10, 1)
+    count = request.args.get('count') or count
+    if count not in COUNT_MODES:
+        abort(400, message=f"Invalid count mode. Use one of: {', '.join(COUNT_MODES)}.")
 
-    paginated = query.paginate(page=page, per_page=limit, error_out=False)
+    if count == 'exact':
+        paginated = query.paginate(page=page, per_page=limit, error_out=False)
+        rows, total, pages = paginated.items, paginated.total, paginated.pages
+        has_prev, has_next = paginated.has_prev, paginated.has_next
+    else:
+        # One extra row tells whether there is a next page without counting
+        rows = query.limit(limit + 1).offset((page - 1) * limit).all()
+        has_prev, has_next = page > 1, len(rows) > limit
+        rows = rows[:limit]
+        total = estimate_count(query) if count == 'estimate' else None
+        pages = math.ceil(total / limit) if total is not None else None
 
     base_url = request.base_url
     args = request.args.to_dict()
     args['limit'] = limit
 
     # Build API hyperlinks
-    prev_url = build_url(args, page - 1, base_url) if paginated.has_prev else None
-    next_url = build_url(args, page + 1, base_url) if paginated.has_next else None
+    prev_url = build_url(args, page - 1, base_url) if has_prev else None
+    next_url = build_url(args, page + 1, base_url) if has_next else None
+
+    context = dump_context(rows) if dump_context else None
+    with Context(context):
+        items = schema.dump(rows)
 
     return {
-        'total': paginated.total,
-        'page': paginated.page,
+        'total': total,
+        'count': count,
+        'page': page,
         'per_page': limit,
-        'pages': paginated.pages,
+        'pages': pages,
         'next': next_url,
         'prev': prev_url,
-        'items': schema.dump(paginated.items),
+        'items': items,
     }
 
 
+def estimate_count(query):
+    """Return the planner's estimate of the number of rows of a query."""
+    return int(explain(query.order_by(None))['Plan']['Plan Rows'])
+
+
 def build_url(request_args, new_page, base_url):
     """Build the URL used in API hyperlinks."""
     request_args['page'] = new_page
     query_string = '&'.join([f'{k}={v}' for k, v in request_args.items()])
     return f"{base_url}?{query_string}"
+
+
+def paginate_keyset(query, schema, columns, cursor=None, limit=None, dump_context=None):
+    """
+    Paginate a query by its position in a descending `columns` order, e.g.
+    `(Transaction.timestamp, Transaction.id)`, where the last column is unique.
+
+    Pages start right after (or, going back, right before) the row encoded in
+    `cursor`, so the cost of a page does not depend on how deep it is and rows
+    inserted meanwhile do not shift pages. The envelope matches
+    `paginate_query`, with opaque cursors in the hyperlinks and no totals.
+    """
+    limit = max(limit or 10, 1)
+    direction, position = decode_cursor(cursor, columns) if cursor else ('next', None)
+    key = tuple_(*columns)
+
+    # The bound on the leading column alone lets indexes that lack the other
+    # columns, such as (user_id, timestamp), still limit the scan
+    if direction == 'next':
+        if position is not None:
+            query = query.filter(columns[0] <= position[0], key < tuple_(*position))
+        order = [column.desc() for column in columns]
+    else:
+        query = query.filter(columns[0] >= position[0], key > tuple_(*position))
+        order = [column.asc() for column in columns]
+
+    rows = query.order_by(None).order_by(*order).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == 'prev':
+        rows.reverse()
+
+    has_next = has_more if direction == 'next' else True
+    has_prev = position is not None if direction == 'next' else has_more
+
+    base_url = request.base_url
+    args = request.args.to_dict()
+    args['limit'] = limit
+    next_url = build_cursor_url(args, encode_cursor('next', rows[-1], columns), base_url) if rows and has_next else None
+    prev_url = build_cursor_url(args, encode_cursor('prev', rows[0], columns), base_url) if rows and has_prev else None
+
+    context = dump_context(rows) if dump_context else None
+    with Context(context):
+        items = schema.dump(rows)
+
+    return {
+        'total': None,
+        'count': 'none',
+        'page': None,
+        'per_page': limit,
+        'pages': None,
+        'next': next_url,
+        'prev': prev_url,
+        'items': items,
+    }
+
+
+def encode_cursor(direction, row, columns):
+    """Encode the position of a row as an opaque, URL-safe cursor."""
+    values = [getattr(row, column.key) for column in columns]
+    payload = json.dumps({'d': direction, 'v': [
+        value.isoformat() if isinstance(value, datetime) else value for value in values
+    ]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Return the `(direction, values)` of a cursor, aborting with 400 if it is invalid."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        direction, values = payload['d'], payload['v']
+        if direction not in ('next', 'prev') or len(values) != len(columns):
+            raise ValueError
+        values = [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else column.type.python_type(value)
+            for column, value in zip(columns, values)
+        ]
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError):
+        abort(400, message="Invalid cursor.")
+    return direction, values
+
+
+def build_cursor_url(request_args, cursor, base_url):
+    """Build the URL used in cursor pagination hyperlinks."""
+    request_args = {key: value for key, value in request_args.items() if key != 'page'}
+    request_args['cursor'] = cursor
+    query_string = '&'.join([f'{k}={v}' for k, v in request_args.items()])
+    return f"{base_url}?{query_string}"
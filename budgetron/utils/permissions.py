@@ -3,6 +3,8 @@ from flask import g
 from flask_restful import abort
 from sqlalchemy.orm.exc import NoResultFound
 
+from budgetron.utils.lookups import get_by_id
+
 
 def is_owner_or_admin(model, id_kwarg="id", owner_attr="user_id", object_arg="obj"):
     """
@@ -14,7 +16,7 @@ def is_owner_or_admin(model, id_kwarg="id", owner_attr="user_id", object_arg="ob
         @wraps(fn)
         def decorated(*args, **kwargs):
             instance_id = kwargs.pop(id_kwarg, None)
-            obj = model.query.get(instance_id)
+            obj = get_by_id(model, instance_id)
 
             if obj is None:
                 abort(404, message=f"{model.__name__} not found.")
@@ -0,0 +1,65 @@
+"""Data version counters used to invalidate cached results."""
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from budgetron.models import DataVersion
+from budgetron.utils.db import db
+
+
+def transactions_key(user_id, month):
+    """Version key for a user's transactions in a 'YYYY-MM' month."""
+    return f"transactions:{user_id}:{month}"
+
+
+def list_key(resource, owner):
+    """
+    Version key for the rows of a list resource owned by a user id, or by
+    'default' for the shared rows every user sees.
+    """
+    return f"list:{resource}:{owner}"
+
+
+def get_version(key):
+    """Return the current version for a key, or 0 if it was never bumped."""
+    return db.session.query(DataVersion.version).filter_by(key=key).scalar() or 0
+
+
+def get_versions(keys):
+    """Return a `{key: version}` dict for the given keys in a single query."""
+    keys = list(keys)
+    versions = dict(
+        db.session.query(DataVersion.key, DataVersion.version).filter(DataVersion.key.in_(keys)).all()
+    ) if keys else {}
+    return {key: versions.get(key, 0) for key in keys}
+
+
+def get_version_stamps(keys):
+    """
+    Return the `{key: version}` of the given keys and the time the latest of
+    them was bumped, or None if none was, in a single query.
+    """
+    keys = list(keys)
+    rows = db.session.query(DataVersion.key, DataVersion.version, DataVersion.updated_at).filter(
+        DataVersion.key.in_(keys)
+    ).all() if keys else []
+    versions = {key: version for key, version, _ in rows}
+    last_modified = max((updated_at for _, _, updated_at in rows), default=None)
+    return {key: versions.get(key, 0) for key in keys}, last_modified
+
+
+def bump_versions(*keys):
+    """
+    Increment the version of each key within the current database transaction,
+    so the bump is committed or rolled back together with the data change.
+    """
+    # Sorted to keep a consistent lock order between concurrent writers
+    rows = [{'key': key, 'version': 1} for key in sorted(set(keys))]
+    if not rows:
+        return
+
+    stmt = insert(DataVersion).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DataVersion.key],
+        set_={'version': DataVersion.version + 1, 'updated_at': func.now()},
+    )
+    db.session.execute(stmt)
@@ -1,4 +1,5 @@
 import logging
+import re
 from logging.config import fileConfig
 
 from flask import current_app
@@ -45,6 +46,24 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Monthly, default and archived partitions of the transactions table are
+# managed by `flask partitions`, not by migrations
+PARTITION_TABLE = re.compile(r'^transactions_(\d{4}_\d{2}|default|archive_\d{4}_\d{2})$')
+
+
+# Indexes that exist only where the database supports them, created by
+# migrations but not declared on the models
+MIGRATION_ONLY_INDEXES = {'ix_transactions_description_trgm'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and reflected and compare_to is None and PARTITION_TABLE.match(name):
+        return False
+    if type_ == 'index' and name in MIGRATION_ONLY_INDEXES:
+        return False
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +84,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +113,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
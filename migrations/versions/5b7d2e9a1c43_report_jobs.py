@@ -0,0 +1,49 @@
+"""report jobs
+
+Revision ID: 5b7d2e9a1c43
+Revises: 09e37db5c55f
+Create Date: 2026-10-18 11:40:12.481930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d2e9a1c43'
+down_revision = '09e37db5c55f'
+branch_labels = None
+depends_on = None
+
+report_status = sa.Enum('pending', 'running', 'done', 'failed', name='report_status')
+
+
+def upgrade():
+    report_status.create(op.get_bind(), checkfirst=True)
+
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('month', sa.String(length=7), nullable=True))
+        batch_op.add_column(sa.Column('status', report_status, server_default='pending', nullable=False))
+        batch_op.add_column(sa.Column('row_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('duration', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('completed_at', sa.DateTime(), nullable=True))
+        batch_op.alter_column('file_url', existing_type=sa.Text(), nullable=True)
+
+    # Reports created before background generation were written synchronously
+    op.execute("UPDATE reports SET status = 'done', completed_at = created_at")
+
+
+def downgrade():
+    op.execute("DELETE FROM reports WHERE file_url IS NULL")
+
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.alter_column('file_url', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('completed_at')
+        batch_op.drop_column('error')
+        batch_op.drop_column('duration')
+        batch_op.drop_column('row_count')
+        batch_op.drop_column('status')
+        batch_op.drop_column('month')
+
+    report_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,125 @@
+"""partition transactions
+
+Revision ID: 8e4c1f7b2d60
+Revises: 6d2b8f4a1c95
+Create Date: 2026-10-18 20:41:37.905214
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4c1f7b2d60'
+down_revision = '6d2b8f4a1c95'
+branch_labels = None
+depends_on = None
+
+# Future months given a partition up front; `flask partitions create` adds more
+PARTITION_MONTHS_AHEAD = 3
+
+COLUMNS = 'id, user_id, category_id, amount, description, timestamp'
+
+# (name, columns) of the btree indexes of the transactions table
+INDEXES = [
+    ('ix_transactions_user_timestamp', ['user_id', 'timestamp']),
+    ('ix_transactions_user_category_timestamp', ['user_id', 'category_id', 'timestamp']),
+    ('ix_transactions_category_timestamp', ['category_id', 'timestamp']),
+    ('ix_transactions_timestamp', ['timestamp']),
+]
+
+
+def create_transactions_table(partitioned):
+    """Create the transactions table, range-partitioned by timestamp or as a plain table."""
+    op.create_table('transactions',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('transactions_id_seq'::regclass)"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('simple', description)", persisted=True), nullable=True),
+    # Named explicitly: the partitions of the other table may still hold the default names
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], name='transactions_category_id_fkey'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='transactions_user_id_fkey'),
+    # A partitioned table's primary key must include the partition key
+    sa.PrimaryKeyConstraint('id', 'timestamp') if partitioned else sa.PrimaryKeyConstraint('id'),
+    **({'postgresql_partition_by': 'RANGE (timestamp)'} if partitioned else {})
+    )
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+
+
+def create_transaction_indexes():
+    for name, columns in INDEXES:
+        op.create_index(name, 'transactions', columns, unique=False)
+    op.create_index('ix_transactions_search_vector', 'transactions', ['search_vector'], unique=False, postgresql_using='gin')
+
+    # Only where the transaction_search migration could install pg_trgm
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar():
+        op.create_index(
+            'ix_transactions_description_trgm', 'transactions', ['description'], unique=False,
+            postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'},
+        )
+
+
+def set_aside_transactions_table(new_name):
+    """Rename the current transactions table and free the constraint and index names it uses."""
+    op.rename_table('transactions', new_name)
+    for constraint in ('pkey', 'user_id_fkey', 'category_id_fkey'):
+        op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT transactions_{constraint} TO {new_name}_{constraint}")
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name=new_name)
+    op.drop_index('ix_transactions_search_vector', table_name=new_name)
+    op.drop_index('ix_transactions_description_trgm', table_name=new_name, if_exists=True)
+
+
+def month_after(month):
+    year, number = divmod(int(month[:4]) * 12 + int(month[5:7]), 12)
+    return f"{year}-{number + 1:02d}"
+
+
+def upgrade():
+    # Rewrites every transaction: run during a maintenance window
+    set_aside_transactions_table('transactions_unpartitioned')
+    create_transactions_table(partitioned=True)
+
+    # A partition for every month holding transactions and the next few months,
+    # and a default partition catching anything outside them
+    bind = op.get_bind()
+    months = set(bind.execute(sa.text(
+        "SELECT DISTINCT to_char(timestamp, 'YYYY-MM') FROM transactions_unpartitioned"
+    )).scalars())
+    month = datetime.now().strftime('%Y-%m')
+    for _ in range(PARTITION_MONTHS_AHEAD + 1):
+        months.add(month)
+        month = month_after(month)
+
+    for month in sorted(months):
+        op.execute(
+            f"CREATE TABLE transactions_{month.replace('-', '_')} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month}-01') TO ('{month_after(month)}-01')"
+        )
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+
+    op.execute(f"INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM transactions_unpartitioned")
+    op.drop_table('transactions_unpartitioned')
+
+    # Indexes created on the parent are created on, and attached from, every partition
+    create_transaction_indexes()
+    op.execute("ANALYZE transactions")
+
+
+def downgrade():
+    set_aside_transactions_table('transactions_partitioned')
+    create_transactions_table(partitioned=False)
+
+    op.execute(f"INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM transactions_partitioned")
+    # Drops the attached partitions too; archived (detached) partitions are kept
+    op.drop_table('transactions_partitioned')
+
+    create_transaction_indexes()
+    op.execute("ANALYZE transactions")
@@ -0,0 +1,68 @@
+"""list endpoint indexes
+
+Revision ID: f1c7a4e9b352
+Revises: e5a19c3b7d26
+Create Date: 2026-10-18 16:20:54.381207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c7a4e9b352'
+down_revision = 'e5a19c3b7d26'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index condition)
+INDEXES = [
+    ('ix_transactions_category_timestamp', 'transactions', ['category_id', 'timestamp'], None),
+    ('ix_transactions_timestamp', 'transactions', ['timestamp'], None),
+    ('ix_reports_user_created_at', 'reports', ['user_id', 'created_at'], None),
+    ('ix_reports_created_at', 'reports', ['created_at'], None),
+    ('ix_budgets_month', 'budgets', ['month'], None),
+    ('ix_budgets_category_id', 'budgets', ['category_id'], None),
+    ('ix_categories_user_id_name', 'categories', ['user_id', 'name'], None),
+    ('ix_categories_default_name', 'categories', ['name'], 'is_default'),
+    ('ix_user_roles_user_id_role_id', 'user_roles', ['user_id', 'role_id'], None),
+    ('ix_user_roles_role_id', 'user_roles', ['role_id'], None),
+]
+
+
+def drop_invalid_index(name):
+    """
+    Drop an index left INVALID by an interrupted CREATE INDEX CONCURRENTLY.
+    IF NOT EXISTS would otherwise skip it, and the planner never uses it.
+    """
+    bind = op.get_bind()
+    invalid = bind.execute(sa.text(
+        """
+        SELECT 1 FROM pg_index
+        JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+        WHERE pg_class.relname = :name AND NOT pg_index.indisvalid
+        """
+    ), {'name': name}).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY does not block writes, but cannot run inside a
+    # transaction. A rerun after an interruption drops the invalid index the
+    # interrupted build left behind, and IF NOT EXISTS skips the ones that
+    # were completed.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            drop_invalid_index(name)
+            op.create_index(
+                name, table, columns, unique=False, if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)